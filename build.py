@@ -2,121 +2,317 @@ from __future__ import annotations
 
 import os
 import shutil
+import stat
+import subprocess
 import sys
-import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
 from pathlib import Path
 
-import PyInstaller.__main__
-
 # BASE_DIR is e:\knowledge_visualization\knowledgesight
 BASE_DIR = Path(__file__).parent
 DIST = BASE_DIR / "dist"
 BUILD = BASE_DIR / "build"
 SPEC = BASE_DIR / "Phoenix.spec"
 
-def clean() -> None:
-    for target in (DIST, BUILD, SPEC):
-        if target.exists():
-            if target.is_dir():
-                shutil.rmtree(target)
-            else:
-                target.unlink()
-
-def build() -> None:
-    clean()
-    
-    # Resources paths
-    static_dir = (BASE_DIR / "resources" / "static").resolve()
-    templates_dir = (BASE_DIR / "resources" / "templates").resolve()
-    maps_dir = (BASE_DIR / "resources" / "maps").resolve()
-    prompts_dir = (BASE_DIR / "llm" / "prompts").resolve()
-    
-    # Original offline dir (for config)
-    original_offline_dir = (BASE_DIR / "resources" / "offline").resolve()
-    credentials_example = (BASE_DIR / "credentials.example.json").resolve()
-    
-    # Icon path
-    icon_path = (BASE_DIR / "vslogo.ico").resolve()
-    
-    print(f"Start building...")
-    print(f"Icon path: {icon_path}")
-    
-    # Prepare clean offline directory (no history files)
-    clean_offline_dir = Path(tempfile.mkdtemp(prefix="phoenix_build_offline_"))
-    print(f"Preparing clean offline directory at: {clean_offline_dir}")
-    
+# Resources paths (resolved once at import)
+STATIC_DIR = (BASE_DIR / "resources" / "static").resolve()
+TEMPLATES_DIR = (BASE_DIR / "resources" / "templates").resolve()
+MAPS_DIR = (BASE_DIR / "resources" / "maps").resolve()
+PROMPTS_DIR = (BASE_DIR / "llm" / "prompts").resolve()
+
+# Original offline dir (for config)
+ORIGINAL_OFFLINE_DIR = (BASE_DIR / "resources" / "offline").resolve()
+CREDENTIALS_EXAMPLE = (BASE_DIR / "credentials.example.json").resolve()
+CREDENTIALS = (BASE_DIR / "credentials.json").resolve()
+
+# Icon path (may be missing; abspath normalises without touching the filesystem)
+ICON_PATH = Path(os.path.abspath(BASE_DIR / "vslogo.ico"))
+
+# --onedir avoids unpacking the whole bundle to a temp dir on every launch;
+# set PYINSTALLER_BUILD_ONEFILE=1 to produce a single exe instead.
+ONEFILE = os.environ.get("PYINSTALLER_BUILD_ONEFILE", "").lower() in ("1", "true", "yes")
+
+# Bytecode optimization level for bundled modules, passed to Analysis(optimize=...)
+# (PyInstaller >= 6.0); 2 strips asserts and docstrings for a smaller archive and
+# faster .pyc loading. Override with PYINSTALLER_BUILD_OPTIMIZE=0/1.
+OPTIMIZE = int(os.environ.get("PYINSTALLER_BUILD_OPTIMIZE", "2"))
+
+# Runtime config shipped in resources/offline; the history subdirs are
+# created on first use by the app, so they are not baked into the bundle.
+OFFLINE_CONFIG_FILES = ["geo_settings.json"]
+
+
+# pefile releases known to make PyInstaller's binary-vs-data reclassification
+# on Windows take minutes (see PyInstaller#8762)
+KNOWN_SLOW_PEFILE_VERSIONS = ("2024.8.26",)
+KNOWN_FAST_PEFILE_VERSION = "2023.2.7"
+
+
+def check_pefile() -> None:
+    if os.name != "nt":
+        return
     try:
-        offline_subdirs = ["animations", "audio", "bar_races", "geo_maps", "mindmaps"]
-        for subdir in offline_subdirs:
-            target_subdir = clean_offline_dir / subdir
-            target_subdir.mkdir(parents=True, exist_ok=True)
-            # Create .gitkeep to ensure directory exists
-            (target_subdir / ".gitkeep").touch()
-        
-        # Copy configuration files if they exist
-        config_files = ["geo_settings.json"]
-        for config_file in config_files:
-            src = original_offline_dir / config_file
+        import pefile
+    except ImportError:
+        return
+    if pefile.__version__ in KNOWN_SLOW_PEFILE_VERSIONS:
+        # Only a warning: the build still succeeds, it is just slow
+        print(
+            f"Warning: pefile {pefile.__version__} makes PyInstaller's reclassification phase take minutes "
+            f"(PyInstaller#8762); consider installing pefile=={KNOWN_FAST_PEFILE_VERSION}"
+        )
+
+
+def _fast_rmtree(path: Path) -> None:
+    """Remove a directory tree with the native tool, which is much faster than shutil on large trees."""
+    if os.name == "nt":
+        cmd = ["cmd", "/c", "rd", "/s", "/q", str(path)]
+    else:
+        cmd = ["rm", "-rf", str(path)]
+    try:
+        result = subprocess.run(cmd, check=False)
+    except OSError:
+        _rmtree_scandir(path)
+        return
+    if result.returncode != 0 or path.exists():
+        # e.g. a locked file on Windows or a permission error: retry in-process so
+        # failures surface here instead of as a confusing PyInstaller error later
+        print(f"Warning: {cmd[0]} exited with {result.returncode} while removing {path}; retrying")
+        _rmtree_scandir(path)
+        if path.exists():
+            raise SystemExit(f"Could not remove {path}; close any program using files in it and retry")
+
+
+def _rmtree_scandir(path: Path) -> None:
+    """Iterative rmtree fallback: one scandir per directory, no extra stat calls."""
+    pending = deque([str(path)])
+    visited: list[str] = []
+    try:
+        while pending:
+            current = pending.pop()
+            visited.append(current)
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    else:
+                        os.unlink(entry.path)
+        # Children were visited after their parents, so remove in reverse
+        for directory in reversed(visited):
+            os.rmdir(directory)
+    except OSError:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def _remove(target: Path) -> None:
+    # One lstat instead of exists() + is_dir()
+    try:
+        st = target.lstat()
+    except FileNotFoundError:
+        return
+    if stat.S_ISDIR(st.st_mode):
+        _fast_rmtree(target)
+    else:
+        target.unlink(missing_ok=True)
+
+
+def clean(fresh: bool = False, regenerate_spec: bool = False) -> None:
+    # Keep build/ and the spec by default so PyInstaller can reuse its analysis cache.
+    targets = (DIST, BUILD) if fresh else (DIST,)
+    # The trees are independent, so delete them concurrently
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(_remove, target) for target in targets]
+        if fresh or regenerate_spec:
+            futures.append(pool.submit(SPEC.unlink, missing_ok=True))
+        wait(futures)
+    for future in futures:
+        future.result()
+
+
+HIDDEN_IMPORTS = [
+    # Hidden imports to ensure PyInstaller finds them
+    "llm.client",
+    "core.orchestrator",
+    "core.animation",
+    "core.graph_builder",
+    "core.media",
+    "core.utils",
+    "core.video_renderer",
+    "storage.cache",
+
+    # PyQt6 specific hidden imports
+    "PyQt6",
+    "PyQt6.QtCore",
+    "PyQt6.QtGui",
+    "PyQt6.QtWidgets",
+    "PyQt6.QtWebEngineWidgets",
+    "PyQt6.QtWebEngineCore",
+]
+
+EXCLUDES = [
+    # Exclude unnecessary web frameworks
+    "uvicorn",
+    "fastapi",
+    "starlette",
+
+    # Exclude heavyweight packages the app never imports
+    "tkinter",
+    "test",
+    "pydoc_data",
+    "tornado",
+    "notebook",
+    "IPython",
+]
+
+_SPEC_TEMPLATE = """# -*- mode: python ; coding: utf-8 -*-
+# Generated by build.py; rewritten automatically whenever the build options change.
+
+a = Analysis(
+    [{entry!r}],
+    pathex=[{base!r}],
+    datas={datas!r},
+    hiddenimports={hiddenimports!r},
+    excludes={excludes!r},
+    optimize={optimize!r},
+)
+{trees}
+pyz = PYZ(a.pure)
+{exe}
+"""
+
+_ONEDIR_EXE = """exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name="Phoenix",
+    console=False,
+    upx=False,
+    icon={icon!r},
+)
+coll = COLLECT(exe, a.binaries, a.datas, upx=False, name="Phoenix")"""
+
+_ONEFILE_EXE = """exe = EXE(
+    pyz,
+    a.scripts,
+    a.binaries,
+    a.datas,
+    [],
+    name="Phoenix",
+    console=False,
+    upx=False,
+    icon={icon!r},
+)"""
+
+
+def _render_spec(clean_offline: bool, use_example_credentials: bool) -> str:
+    """Render Phoenix.spec for the given options; each resource directory is collected by a single Tree() walk."""
+    # Resource directories: (source, destination in bundle)
+    trees = [
+        (STATIC_DIR, "resources/static"),
+        (TEMPLATES_DIR, "resources/templates"),
+        (MAPS_DIR, "resources/maps"),
+        (PROMPTS_DIR, "llm/prompts"),
+    ]
+    # Single files: (source, destination dir in bundle)
+    datas = [(str(ICON_PATH), "static")]  # Add icon to static folder in bundle
+
+    if use_example_credentials:
+        datas.append((str(CREDENTIALS_EXAMPLE), "."))  # Add example credentials
+    else:
+        datas.append((str(CREDENTIALS), "."))
+
+    if clean_offline:
+        # Ship only the offline config files (no history files)
+        for config_file in OFFLINE_CONFIG_FILES:
+            src = ORIGINAL_OFFLINE_DIR / config_file
             if src.exists():
-                shutil.copy2(src, clean_offline_dir / config_file)
-        
-        params = [
-            str(BASE_DIR / "main.py"),  # Entry point
-            "--name=Phoenix",
-            "--onefile",
-            "--windowed",
-            "--clean",
-            "--noconfirm",
-            
-            # Add data: source_path;dest_path
-            f"--add-data={static_dir}{os.pathsep}resources/static",
-            f"--add-data={templates_dir}{os.pathsep}resources/templates",
-            f"--add-data={maps_dir}{os.pathsep}resources/maps",
-            f"--add-data={prompts_dir}{os.pathsep}llm/prompts",
-            f"--add-data={credentials_example}{os.pathsep}.",  # Add example credentials
-            f"--add-data={clean_offline_dir}{os.pathsep}resources/offline", # Use clean dir
-            f"--add-data={icon_path}{os.pathsep}static", # Add icon to static folder in bundle
-            
-            # Hidden imports to ensure PyInstaller finds them
-            "--hidden-import=llm.client",
-            "--hidden-import=core.orchestrator",
-            "--hidden-import=core.animation",
-            "--hidden-import=core.graph_builder",
-            "--hidden-import=core.media",
-            "--hidden-import=core.utils",
-            "--hidden-import=core.video_renderer",
-            "--hidden-import=storage.cache",
-            
-            # PyQt6 specific hidden imports
-            "--hidden-import=PyQt6",
-            "--hidden-import=PyQt6.QtCore",
-            "--hidden-import=PyQt6.QtGui",
-            "--hidden-import=PyQt6.QtWidgets",
-            "--hidden-import=PyQt6.QtWebEngineWidgets",
-            "--hidden-import=PyQt6.QtWebEngineCore",
-            
-            # Exclude unnecessary web frameworks
-            "--exclude-module=uvicorn",
-            "--exclude-module=fastapi",
-            "--exclude-module=starlette",
-        ]
-
-        if icon_path.exists():
-            params.append(f"--icon={icon_path}")
-        else:
-            print(f"Warning: Icon not found at {icon_path}")
-
-        PyInstaller.__main__.run(params)
+                datas.append((str(src), "resources/offline"))
+    else:
+        trees.append((ORIGINAL_OFFLINE_DIR, "resources/offline"))
+
+    icon = None
+    if ICON_PATH.exists():
+        icon = str(ICON_PATH)
+    else:
+        print(f"Warning: Icon not found at {ICON_PATH}")
+
+    exe_template = _ONEFILE_EXE if ONEFILE else _ONEDIR_EXE
+    return _SPEC_TEMPLATE.format(
+        entry=str(BASE_DIR / "main.py"),  # Entry point
+        base=str(BASE_DIR.resolve()),
+        datas=datas,
+        hiddenimports=HIDDEN_IMPORTS,
+        excludes=EXCLUDES,
+        optimize=OPTIMIZE,
+        trees="".join(
+            f"a.datas += Tree({str(source)!r}, prefix={prefix!r})\n" for source, prefix in trees
+        ),
+        exe=exe_template.format(icon=icon),
+    )
+
+
+def build(
+    fresh: bool = False,
+    clean_offline: bool = True,
+    use_example_credentials: bool = True,
+    regenerate_spec: bool = False,
+) -> None:
+    check_pefile()
+    clean(fresh, regenerate_spec)
+
+    print(f"Start building...")
+    print(f"Icon path: {ICON_PATH}")
+
+    # Render the spec on every run but only rewrite it when the options changed:
+    # an untouched spec keeps PyInstaller's analysis cache warm.
+    spec_text = _render_spec(clean_offline, use_example_credentials)
+    try:
+        current = SPEC.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        current = None
+    if current == spec_text:
+        print(f"Reusing {SPEC.name}")
+    else:
+        SPEC.write_text(spec_text, encoding="utf-8")
+        print(f"Wrote {SPEC.name}")
+    params = [str(SPEC), "--noconfirm", f"--distpath={DIST}", f"--workpath={BUILD}"]
+
+    if fresh:
+        params.append("--clean")
+
+    # Imported lazily: PyInstaller is heavy and `python build.py clean` never needs it
+    import PyInstaller.__main__
+
+    PyInstaller.__main__.run(params)
+    if ONEFILE:
         print("打包完成，文件位于 dist/ 目录。")
-        
-    finally:
-        # Cleanup temp dir
-        if clean_offline_dir.exists():
-             try:
-                 shutil.rmtree(clean_offline_dir)
-                 print("Cleaned up temp directory.")
-             except Exception as e:
-                 print(f"Warning: Failed to cleanup temp dir: {e}")
+    else:
+        print("打包完成，程序目录位于 dist/Phoenix/。")
+
+
+def cmd_clean(fresh: bool = False, regenerate_spec: bool = False) -> None:
+    clean(fresh, regenerate_spec)
+    print("清理完成。")
+
 
 if __name__ == "__main__":
-    build()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build Phoenix with PyInstaller")
+    parser.add_argument("command", nargs="?", choices=("build", "clean"), default="build")
+    parser.add_argument("--fresh", action="store_true", help="discard the build cache and rebuild from scratch")
+    parser.add_argument("--regenerate-spec", action="store_true", help="delete Phoenix.spec so it is rewritten (it is also refreshed automatically when options change)")
+    parser.add_argument("--with-offline-history", action="store_true", help="bundle resources/offline as-is, including generated history")
+    parser.add_argument("--with-credentials", action="store_true", help="bundle credentials.json instead of credentials.example.json")
+    args = parser.parse_args()
+    if args.command == "clean":
+        cmd_clean(fresh=args.fresh, regenerate_spec=args.regenerate_spec)
+    else:
+        build(
+            fresh=args.fresh,
+            clean_offline=not args.with_offline_history,
+            use_example_credentials=not args.with_credentials,
+            regenerate_spec=args.regenerate_spec,
+        )
@@ -1,8 +1,26 @@
 from __future__ import annotations
 
 import html
+import json
+import logging
 import math
-from typing import Dict, Iterable, List
+import random
+import re
+import string
+from functools import lru_cache
+from itertools import cycle, islice
+from typing import Dict, Final, Iterable, Iterator, List
+
+try:
+    # orjson 可选：解析 AI 返回的大段 JSON 分镜更快，接口与 json.loads 一致
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+log = logging.getLogger(__name__)
+
+# html.escape 是纯函数，重复出现的标题/正文直接命中缓存
+_esc = lru_cache(maxsize=512)(html.escape)
 
 _DEFAULT_THEME = {
     "background": "linear-gradient(160deg, #E9ECFF 0%, #C7D2FE 100%)",
@@ -11,129 +29,112 @@ _DEFAULT_THEME = {
     "text": "#4338CA",
 }
 
+# AI 输出解析用到的正则，模块加载时编译一次
+_RE_DANGER = re.compile(r'<script|javascript:', re.IGNORECASE)
+_RE_JSON_BLOCK = re.compile(r'```json\s*([\[\{].*?[\]\}])\s*```', re.DOTALL)
+_RE_JSON_ARRAY = re.compile(r'^\s*\[\s*\{.*?\}\s*\]', re.DOTALL | re.MULTILINE)
+_RE_JSON_SLIDES = re.compile(r'\{[^{}]*"slides"[^{}]*\[.*?\]\s*\}', re.DOTALL)
+_RE_SVG_START = re.compile(r'<svg[^>]*?>', re.IGNORECASE)
+_RE_SVG_END = re.compile(r'</svg>', re.IGNORECASE)
+# 分镜注释：标题 <!-- 分镜X：标题 --> / <!-- Title: ... --> 与配音 <!-- 配音：文字 --> 合并为一次扫描
+_RE_META = re.compile(
+    r'<!--\s*(?:(?P<title_kind>分镜\s*\d+|画面\s*\d+|Scene\s*\d+|Part\s*\d+|标题|Title)\s*[：:]\s*(?P<title>[^-]+?)'
+    r'|(?:配音|Voiceover|Narration|Audio)\s*[：:]\s*(?P<narration>[^-]+?))\s*-->',
+    re.IGNORECASE,
+)
+_RE_TRIM_PUNCT = re.compile(r'^[^\w\s]+|[^\w\s]+$')
 
-def default_storyboard(topic: str) -> List[Dict[str, str]]:
-    return [
-        {"heading": topic, "body": "生成中，当前展示离线预览。"},
-        {"heading": "理解重点", "body": "联网后将出现 AI 驱动的互动动画。"},
-        {"heading": "下一步", "body": "填写密钥或导入离线资源即可体验完整效果。"},
-    ]
+# 合并分镜时的 viewBox 解析与内容提取
+_VIEWBOX_RE = re.compile(r'viewBox=["\']([\d\s\.\-,]+)["\']', re.IGNORECASE)
 
+# 纯文本分段：匹配 "1." "2." 或 "一、" "二、" 等格式
+_SECTION_RE = re.compile(r'(?:\d+\.|[一二三四五六七八九十]+、)')
+_MAX_TEXT_PARSE_LEN = 100_000
 
-def storyboard_to_svg(frames: Iterable[Dict[str, str]], frame_durations: List[float] | None = None) -> str:
-    slides: List[str] = []
-    frame_list = list(frames)
-    total_frames = len(frame_list)
-    
-    # 使用传入的实际音频时长，或默认6秒每帧
-    if frame_durations is None:
-        # 尝试从frame数据中获取时长
-        computed_durations = []
-        for frame in frame_list:
-            # 支持 'duration' 或 'seconds' 字段
-            d = float(frame.get("duration", frame.get("seconds", 6.0)))
-            computed_durations.append(d)
-        frame_durations = computed_durations
-    elif len(frame_durations) < total_frames:
-        # 如果时长列表不够，补齐到帧数
-        frame_durations = list(frame_durations) + [6.0] * (total_frames - len(frame_durations))
-    
-    total_duration = sum(frame_durations)
-    
-    # 定义多种动画效果样式
-    animation_styles = [
-        "slide-zoom",   # 缩放入场
-        "slide-rotate", # 旋转入场
-        "slide-flip",   # 翻转入场
-        "slide-bounce", # 弹跳入场
-        "slide-blur"    # 模糊入场
-    ]
-    
-    # 定义多种运镜效果 (Camera Moves)
-    camera_moves = [
-        "move-zoom-slow",
-        "move-pan-h",
-        "move-float"
-    ]
-    
-    cumulative_delay = 0.0  # 累计延迟时间
-    for index, frame in enumerate(frame_list):
-        delay = cumulative_delay
-        current_duration = frame_durations[index]
-        title = html.escape(frame.get("heading", "瞬间"))
-        body = html.escape(frame.get("body", ""))
-        narration = html.escape(frame.get("narration", body))
-        
-        # 为不同帧选择不同的动画效果
-        animation_class = animation_styles[index % len(animation_styles)]
-        # 为不同帧选择不同的运镜效果
-        camera_class = camera_moves[index % len(camera_moves)]
-        
-        # 添加进度指示器
-        progress_dots = ""
-        for i in range(total_frames):
-            opacity = "1" if i == index else "0.3"
-            # Center at 800. Offset = (i - (total_frames - 1) / 2) * spacing
-            cx = 800 + (i - (total_frames - 1) / 2) * 50
-            progress_dots += f'<circle cx="{cx}" cy="820" r="8" fill="#4F46E5" opacity="{opacity}" />'
-        
-        # 生成粒子效果（每帧30个粒子）
-        particles = []
-        for p in range(30):
-            import random
-            angle_rad = math.radians((360 / 30) * p)
-            distance = 450 + random.randint(-100, 250)
-            # Calculate delta (offset) from center (800, 450)
-            dx = distance * math.cos(angle_rad)
-            dy = distance * math.sin(angle_rad) * 0.8  # Elliptical distribution
-            particle_delay = (p * 0.08)
-            color = ["#4F46E5", "#10B981", "#F59E0B", "#EF4444"][p % 4]
-            r = random.randint(4, 9)
-            particles.append(
-                f'<circle class="particle" cx="800" cy="450" r="{r}" fill="{color}" '
-                f'style="--tx:{dx}px; --ty:{dy}px; animation-delay:{particle_delay}s;" />'
-            )
-        
-        # 添加发光效果的装饰元素
-        glow_circles = []
-        for g in range(3):
-            gr = 200 + g * 100  # Larger radius
-            glow_delay = (g * 0.3)
-            glow_circles.append(
-                f'<circle class="glow-ring" cx="800" cy="450" r="{gr}" '
-                f'fill="none" stroke="#4F46E5" stroke-width="3" opacity="0" '
-                f'style="animation-delay:{glow_delay}s;" />'
-            )
-        
-        slide = f"""
-        <g id="slide-{index}" class="slide-group {animation_class}" data-animation="{animation_class}">
+# SVG 压缩：去掉模板里的注释和标签之间的缩进/换行
+_RE_XML_COMMENT = re.compile(r'<!--.*?-->', re.DOTALL)
+_RE_INTERTAG_WS = re.compile(r'>\s+<')
+
+# 移除常见的AI开场白
+_RE_AI_METADATA = tuple(
+    re.compile(pattern, re.MULTILINE | re.DOTALL)
+    for pattern in (
+        r'^好的[，,].*?(?=<svg|$)',  # "好的，作为..."
+        r'^作为.*?(?=<svg|$)',  # "作为一名..."
+        r'###\s*SVG\s*代码.*?```html',  # "### SVG 代码 ```html"
+        r'###\s*[^\n]*',  # 其他 ### 标题
+        r'```html\s*',  # ```html 标记
+        r'```\s*$',  # 结尾的 ```
+        r'^这段代码.*$',  # "这段代码可以..."
+        r'^\*\*.*?\*\*[:：]',  # **粗体标题**:
+    )
+)
+
+
+# 30 个粒子均匀分布在圆周上，三角函数值查表即可
+_PARTICLE_COUNT = 30
+_PARTICLE_COS = [math.cos(math.radians((360 / _PARTICLE_COUNT) * p)) for p in range(_PARTICLE_COUNT)]
+_PARTICLE_SIN = [math.sin(math.radians((360 / _PARTICLE_COUNT) * p)) for p in range(_PARTICLE_COUNT)]
+_PARTICLE_COLORS = ("#4F46E5", "#10B981", "#F59E0B", "#EF4444")
+
+
+def _build_particles() -> str:
+    """粒子层与帧无关：用固定种子生成一次，每帧复用同一段 SVG"""
+    rng = random.Random(0)
+    particles = []
+    for p in range(_PARTICLE_COUNT):
+        distance = 450 + rng.randint(-100, 250)
+        # Calculate delta (offset) from center (800, 450)
+        dx = distance * _PARTICLE_COS[p]
+        dy = distance * _PARTICLE_SIN[p] * 0.8  # Elliptical distribution
+        particle_delay = (p * 0.08)
+        color = _PARTICLE_COLORS[p % 4]
+        r = rng.randint(4, 9)
+        particles.append(
+            f'<circle class="particle" cx="800" cy="450" r="{r}" fill="{color}" '
+            f'style="--tx:{dx}px; --ty:{dy}px; animation-delay:{particle_delay}s;" />'
+        )
+    return "".join(particles)
+
+
+_PARTICLES_SVG = _build_particles()
+
+def _minify_svg(markup: str) -> str:
+    """压缩自有模板的 SVG 片段（去注释、去标签间空白），只在导入时对常量模板执行一次
+
+    不用于拼好的完整输出：那样每次渲染都要全量扫描，还会吞掉用户文字节点之间的空白
+    """
+    return _RE_INTERTAG_WS.sub('><', _RE_XML_COMMENT.sub('', markup)).strip()
+
+
+# 发光圆环同样与帧无关，导入时拼好
+_GLOW_SVG = "".join(
+    f'<circle class="glow-ring" cx="800" cy="450" r="{200 + g * 100}" '
+    f'fill="none" stroke="#4F46E5" stroke-width="3" opacity="0" '
+    f'style="animation-delay:{g * 0.3}s;" />'
+    for g in range(3)
+)
+
+# 每帧幻灯片模板：在 {字段} 处切成常量片段，循环里按字段顺序穿插拼接，
+# 避免每帧执行一个几十行的 f-string
+_SLIDE_TEMPLATE = ("""<g id="slide-{index}" class="slide-group {animation_class}" data-animation="{animation_class}">
             <!-- 运镜层：包裹视觉元素以实现独立运镜 -->
             <g class="camera-layer {camera_class}">
                 <!-- 粒子效果 -->
                 <g class="particle-system">
-                    {''.join(particles)}
+                    """ + _PARTICLES_SVG + """
                 </g>
                 
                 <!-- 发光圆环 -->
                 <g class="glow-system">
-                    {''.join(glow_circles)}
+                    """ + _GLOW_SVG + """
                 </g>
                 
                 <!-- 主卡片 -->
                 <g class="card-container">
-                    <defs>
-                        <filter id="card-glow-{index}">
-                            <feGaussianBlur in="SourceGraphic" stdDeviation="12" result="blur"/>
-                            <feComposite in="blur" in2="SourceGraphic" operator="over"/>
-                        </filter>
-                        <linearGradient id="card-grad-{index}" x1="0%" y1="0%" x2="100%" y2="100%">
-                            <stop offset="0%" style="stop-color:#FFFFFF; stop-opacity:1" />
-                            <stop offset="100%" style="stop-color:#F0F4FF; stop-opacity:1" />
-                        </linearGradient>
-                    </defs>
                     <!-- 1600x900 Layout: Card centered -->
                     <rect class="card" x="200" y="150" width="1200" height="500" rx="40" 
-                          fill="url(#card-grad-{index})" filter="url(#card-glow-{index})" />
+                          fill="url(#card-grad)" filter="url(#card-glow)" />
                     
                     <!-- 装饰性的光效条纹 -->
                     <line class="shine-line" x1="200" y1="200" x2="1400" y2="200" 
@@ -152,17 +153,201 @@ def storyboard_to_svg(frames: Iterable[Dict[str, str]], frame_durations: List[fl
             
             <!-- 进度指示器 (不受运镜影响) -->
             <g class="progress-indicator">
-                {progress_dots}
+                {progress}
             </g>
-        </g>
-        """
-        slides.append(slide.strip())
-        
-        # 累加当前帧的时长
-        cumulative_delay += current_duration
+        </g>""")
+# 占位符本身也夹在标签之间（如 {progress}），一并去掉两侧空白
+_SLIDE_TEMPLATE = re.sub(r'>\s+(\{\w+\})\s+<', r'>\1<', _minify_svg(_SLIDE_TEMPLATE))
+_SLIDE_CHUNKS = tuple(literal for literal, _, _, _ in string.Formatter().parse(_SLIDE_TEMPLATE))
+
+
+# storyboard_to_svg 的样式表是纯静态文本，导入时格式化一次
+_STYLE_BLOCK = f"""<style>
+    .viz-canvas {{ 
+        background: {_DEFAULT_THEME['background']}; 
+        font-family: 'Segoe UI', 'Microsoft YaHei', sans-serif;
+    }}
+    
+    /* 卡片样式 */
+    .card {{ 
+        filter: drop-shadow(0 30px 60px rgba(79,70,229,0.25));
+        transition: all 0.3s ease;
+    }}
+    .card-container {{ 
+        transform-origin: center center;
+    }}
+    
+    /* 文字样式 */
+    .title {{ 
+        font: 700 64px 'Segoe UI', 'Microsoft YaHei', sans-serif; 
+        fill: {_DEFAULT_THEME['title']};
+    }}
+    .copy {{ 
+        font: 400 36px 'Segoe UI', 'Microsoft YaHei', sans-serif; 
+        color: {_DEFAULT_THEME['text']}; 
+        line-height: 1.6;
+    }}
+    .subtitle {{ 
+        font: 500 28px 'Segoe UI', 'Microsoft YaHei', sans-serif; 
+        color: #6366F1; 
+        text-align: center; 
+        line-height: 1.5;
+        padding: 16px 40px;
+        background: rgba(255,255,255,0.8);
+        border-radius: 20px;
+        box-shadow: 0 8px 24px rgba(99,102,241,0.15);
+    }}
+    
+    /* 粒子动画 */
+    .particle {{
+        animation: particle-fly 3s ease-out infinite;
+        transform-origin: center;
+    }}
+    @keyframes particle-fly {{
+        0% {{ opacity: 0; transform: translate(0, 0) scale(0); }}
+        20% {{ opacity: 1; }}
+        100% {{ opacity: 0; transform: translate(var(--tx), var(--ty)) scale(2); }}
+    }}
+    
+    /* 发光圆环动画 */
+    .glow-ring {{
+        animation: glow-expand 2s ease-out infinite;
+    }}
+    @keyframes glow-expand {{
+        0% {{ opacity: 0; r: 50; }}
+        30% {{ opacity: 0.6; }}
+        100% {{ opacity: 0; r: 250; }}
+    }}
+    
+    /* 光效线条动画 */
+    .shine-line {{
+        animation: shine-sweep 2s ease-in-out infinite;
+    }}
+    @keyframes shine-sweep {{
+        0%, 100% {{ opacity: 0; }}
+        50% {{ opacity: 0.8; }}
+    }}
+    
+    /* === 基础滑入动画 === */
+    .slide-group {{
+        opacity: 0;
+        display: none;
+        transform-origin: 50% 50%;
+    }}
+    
+    .slide-active {{
+        display: block !important;
+        animation-duration: 0.8s; /* 延长到 0.8s */
+        animation-timing-function: cubic-bezier(0.2, 0.8, 0.2, 1);
+        animation-fill-mode: forwards;
+    }}
+    
+    /* === 离场动画 (新) === */
+    .slide-exit {{
+        display: block !important;
+        animation: slide-out-blur 0.8s cubic-bezier(0.4, 0, 0.2, 1) forwards;
+        pointer-events: none;
+    }}
+    @keyframes slide-out-blur {{
+        0% {{ opacity: 1; filter: blur(0px); transform: scale(1); }}
+        100% {{ opacity: 0; filter: blur(10px); transform: scale(1.1); }}
+    }}
+    
+    /* === 运镜动画 (新) === */
+    .camera-layer {{
+        transform-origin: center center;
+    }}
+    .move-zoom-slow {{ animation: cam-zoom-s 12s linear infinite alternate; }}
+    .move-pan-h {{ animation: cam-pan-h 15s ease-in-out infinite alternate; }}
+    .move-float {{ animation: cam-float 20s ease-in-out infinite; }}
+    
+    /* High Energy Camera Moves (Consistent with _merge_svg_frames) */
+    .camera-zoom-in {{ animation: camZoomIn 20s linear forwards; transform-origin: 800px 450px; }}
+    .camera-zoom-out {{ animation: camZoomOut 20s linear forwards; transform-origin: 800px 450px; }}
+    .camera-pan-right {{ animation: camPanRight 20s linear forwards; }}
+    .camera-pan-left {{ animation: camPanLeft 20s linear forwards; }}
+    .camera-pan-up {{ animation: camPanUp 20s linear forwards; }}
+    .camera-float {{ animation: cam-float 20s ease-in-out infinite; }}
+    .move-zoom-slow, .move-pan-h, .move-float,
+    .camera-zoom-in, .camera-zoom-out, .camera-pan-right, .camera-pan-left, .camera-pan-up, .camera-float {{ will-change: transform; }}
+
+    @keyframes cam-zoom-s {{ 0% {{ transform: scale(1); }} 100% {{ transform: scale(1.08); }} }}
+    @keyframes cam-pan-h {{ 0% {{ transform: translateX(-15px); }} 100% {{ transform: translateX(15px); }} }}
+    @keyframes cam-float {{ 
+        0% {{ transform: translate(0,0) rotate(0deg); }} 
+        33% {{ transform: translate(10px, -10px) rotate(1deg); }} 
+        66% {{ transform: translate(-5px, 10px) rotate(-1deg); }} 
+        100% {{ transform: translate(0,0) rotate(0deg); }} 
+    }}
+    
+    @keyframes camZoomIn {{ from {{ transform: scale(1); }} to {{ transform: scale(1.4); }} }}
+    @keyframes camZoomOut {{ from {{ transform: scale(1.4); }} to {{ transform: scale(1); }} }}
+    @keyframes camPanRight {{ from {{ transform: translateX(0); }} to {{ transform: translateX(-100px); }} }}
+    @keyframes camPanLeft {{ from {{ transform: translateX(-100px); }} to {{ transform: translateX(0); }} }}
+    @keyframes camPanUp {{ from {{ transform: translateY(0); }} to {{ transform: translateY(-80px); }} }}
+    
+    /* === 入场动画库 === */
+    
+    /* 缩放入场 */
+    .slide-zoom {{
+        animation-name: slide-zoom-anim;
+    }}
+    @keyframes slide-zoom-anim {{
+        0% {{ opacity: 0; transform: scale(0.6) translateY(30px); filter: blur(5px); }}
+        100% {{ opacity: 1; transform: scale(1) translateY(0); filter: blur(0); }}
+    }}
+    
+    /* 旋转入场 */
+    .slide-rotate {{
+        animation-name: slide-rotate-anim;
+    }}
+    @keyframes slide-rotate-anim {{
+        0% {{ opacity: 0; transform: perspective(800px) rotateY(60deg) scale(0.8); }}
+        100% {{ opacity: 1; transform: perspective(800px) rotateY(0deg) scale(1); }}
+    }}
+    
+    /* 翻转入场 */
+    .slide-flip {{
+        animation-name: slide-flip-anim;
+    }}
+    @keyframes slide-flip-anim {{
+        0% {{ opacity: 0; transform: perspective(800px) rotateX(-60deg) translateZ(-100px); }}
+        100% {{ opacity: 1; transform: perspective(800px) rotateX(0deg) translateZ(0); }}
+    }}
+    
+    /* 弹跳入场 */
+    .slide-bounce {{
+        animation-name: slide-bounce-anim;
+    }}
+    @keyframes slide-bounce-anim {{
+        0% {{ opacity: 0; transform: translateY(100px) scale(0.8); }}
+        60% {{ transform: translateY(-10px) scale(1.05); }}
+        100% {{ opacity: 1; transform: translateY(0) scale(1); }}
+    }}
+    
+    /* 模糊入场 (新) */
+    .slide-blur {{
+        animation-name: slide-blur-anim;
+    }}
+    @keyframes slide-blur-anim {{
+        0% {{ opacity: 0; filter: blur(20px); transform: scale(1.1); }}
+        100% {{ opacity: 1; filter: blur(0); transform: scale(1); }}
+    }}
+
+    /* 高级动画库 (Fallback Support) */
+    .anim-shiver {{ animation: shiver 0.2s linear infinite; }}
+    @keyframes shiver {{ 0% {{ transform: translate(1px, 1px); }} 100% {{ transform: translate(-1px, -1px); }} }}
+
+    .anim-slide-right {{ animation: slideRight 1s ease-out forwards; opacity: 0; transform: translateX(-50px); }}
+    @keyframes slideRight {{ to {{ opacity: 1; transform: translateX(0); }} }}
 
-    return f"""
-    <svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 1600 900" class="viz-canvas">
+    @keyframes magneticFlow {{ to {{ stroke-dashoffset: -20; }} }}
+    .anim-magnetic-flow {{ stroke-dasharray: 10, 5; animation: magneticFlow 1s linear infinite; }}
+</style>"""
+
+
+# 画布开头（全局 defs + 样式表）与帧无关，导入时拼好并压缩一次
+_SVG_HEAD = _minify_svg("""<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 1600 900" class="viz-canvas">
         <defs>
             <!-- 全局渐变定义 -->
             <linearGradient id="shine-grad" x1="0%" y1="0%" x2="100%" y2="0%">
@@ -176,261 +361,177 @@ def storyboard_to_svg(frames: Iterable[Dict[str, str]], frame_durations: List[fl
                     <animate attributeName="offset" values="1;0;1" dur="3s" repeatCount="indefinite"/>
                 </stop>
             </linearGradient>
+            <!-- 卡片滤镜与渐变：各帧参数相同，共用一份 -->
+            <filter id="card-glow">
+                <feGaussianBlur in="SourceGraphic" stdDeviation="12" result="blur"/>
+                <feComposite in="blur" in2="SourceGraphic" operator="over"/>
+            </filter>
+            <linearGradient id="card-grad" x1="0%" y1="0%" x2="100%" y2="100%">
+                <stop offset="0%" style="stop-color:#FFFFFF; stop-opacity:1" />
+                <stop offset="100%" style="stop-color:#F0F4FF; stop-opacity:1" />
+            </linearGradient>
         </defs>
         
-        <style>
-            .viz-canvas {{ 
-                background: {_DEFAULT_THEME['background']}; 
-                font-family: 'Segoe UI', 'Microsoft YaHei', sans-serif;
-            }}
-            
-            /* 卡片样式 */
-            .card {{ 
-                filter: drop-shadow(0 30px 60px rgba(79,70,229,0.25));
-                transition: all 0.3s ease;
-            }}
-            .card-container {{ 
-                transform-origin: center center;
-            }}
-            
-            /* 文字样式 */
-            .title {{ 
-                font: 700 64px 'Segoe UI', 'Microsoft YaHei', sans-serif; 
-                fill: {_DEFAULT_THEME['title']};
-            }}
-            .copy {{ 
-                font: 400 36px 'Segoe UI', 'Microsoft YaHei', sans-serif; 
-                color: {_DEFAULT_THEME['text']}; 
-                line-height: 1.6;
-            }}
-            .subtitle {{ 
-                font: 500 28px 'Segoe UI', 'Microsoft YaHei', sans-serif; 
-                color: #6366F1; 
-                text-align: center; 
-                line-height: 1.5;
-                padding: 16px 40px;
-                background: rgba(255,255,255,0.8);
-                border-radius: 20px;
-                box-shadow: 0 8px 24px rgba(99,102,241,0.15);
-            }}
-            
-            /* 粒子动画 */
-            .particle {{
-                animation: particle-fly 3s ease-out infinite;
-                transform-origin: center;
-            }}
-            @keyframes particle-fly {{
-                0% {{ opacity: 0; transform: translate(0, 0) scale(0); }}
-                20% {{ opacity: 1; }}
-                100% {{ opacity: 0; transform: translate(var(--tx), var(--ty)) scale(2); }}
-            }}
-            
-            /* 发光圆环动画 */
-            .glow-ring {{
-                animation: glow-expand 2s ease-out infinite;
-            }}
-            @keyframes glow-expand {{
-                0% {{ opacity: 0; r: 50; }}
-                30% {{ opacity: 0.6; }}
-                100% {{ opacity: 0; r: 250; }}
-            }}
-            
-            /* 光效线条动画 */
-            .shine-line {{
-                animation: shine-sweep 2s ease-in-out infinite;
-            }}
-            @keyframes shine-sweep {{
-                0%, 100% {{ opacity: 0; }}
-                50% {{ opacity: 0.8; }}
-            }}
-            
-            /* === 基础滑入动画 === */
-            .slide-group {{
-                opacity: 0;
-                display: none;
-                transform-origin: 50% 50%;
-            }}
-            
-            .slide-active {{
-                display: block !important;
-                animation-duration: 0.8s; /* 延长到 0.8s */
-                animation-timing-function: cubic-bezier(0.2, 0.8, 0.2, 1);
-                animation-fill-mode: forwards;
-            }}
-            
-            /* === 离场动画 (新) === */
-            .slide-exit {{
-                display: block !important;
-                animation: slide-out-blur 0.8s cubic-bezier(0.4, 0, 0.2, 1) forwards;
-                pointer-events: none;
-            }}
-            @keyframes slide-out-blur {{
-                0% {{ opacity: 1; filter: blur(0px); transform: scale(1); }}
-                100% {{ opacity: 0; filter: blur(10px); transform: scale(1.1); }}
-            }}
-            
-            /* === 运镜动画 (新) === */
-            .camera-layer {{
-                transform-origin: center center;
-            }}
-            .move-zoom-slow {{ animation: cam-zoom-s 12s linear infinite alternate; }}
-            .move-pan-h {{ animation: cam-pan-h 15s ease-in-out infinite alternate; }}
-            .move-float {{ animation: cam-float 20s ease-in-out infinite; }}
-            
-            /* High Energy Camera Moves (Consistent with _merge_svg_frames) */
-            .camera-zoom-in {{ animation: camZoomIn 20s linear forwards; transform-origin: 800px 450px; }}
-            .camera-zoom-out {{ animation: camZoomOut 20s linear forwards; transform-origin: 800px 450px; }}
-            .camera-pan-right {{ animation: camPanRight 20s linear forwards; }}
-            .camera-pan-left {{ animation: camPanLeft 20s linear forwards; }}
-            .camera-pan-up {{ animation: camPanUp 20s linear forwards; }}
-            .camera-float {{ animation: cam-float 20s ease-in-out infinite; }}
-
-            @keyframes cam-zoom-s {{ 0% {{ transform: scale(1); }} 100% {{ transform: scale(1.08); }} }}
-            @keyframes cam-pan-h {{ 0% {{ transform: translateX(-15px); }} 100% {{ transform: translateX(15px); }} }}
-            @keyframes cam-float {{ 
-                0% {{ transform: translate(0,0) rotate(0deg); }} 
-                33% {{ transform: translate(10px, -10px) rotate(1deg); }} 
-                66% {{ transform: translate(-5px, 10px) rotate(-1deg); }} 
-                100% {{ transform: translate(0,0) rotate(0deg); }} 
-            }}
-            
-            @keyframes camZoomIn {{ from {{ transform: scale(1); }} to {{ transform: scale(1.4); }} }}
-            @keyframes camZoomOut {{ from {{ transform: scale(1.4); }} to {{ transform: scale(1); }} }}
-            @keyframes camPanRight {{ from {{ transform: translateX(0); }} to {{ transform: translateX(-100px); }} }}
-            @keyframes camPanLeft {{ from {{ transform: translateX(-100px); }} to {{ transform: translateX(0); }} }}
-            @keyframes camPanUp {{ from {{ transform: translateY(0); }} to {{ transform: translateY(-80px); }} }}
-            
-            /* === 入场动画库 === */
-            
-            /* 缩放入场 */
-            .slide-zoom {{
-                animation-name: slide-zoom-anim;
-            }}
-            @keyframes slide-zoom-anim {{
-                0% {{ opacity: 0; transform: scale(0.6) translateY(30px); filter: blur(5px); }}
-                100% {{ opacity: 1; transform: scale(1) translateY(0); filter: blur(0); }}
-            }}
-            
-            /* 旋转入场 */
-            .slide-rotate {{
-                animation-name: slide-rotate-anim;
-            }}
-            @keyframes slide-rotate-anim {{
-                0% {{ opacity: 0; transform: perspective(800px) rotateY(60deg) scale(0.8); }}
-                100% {{ opacity: 1; transform: perspective(800px) rotateY(0deg) scale(1); }}
-            }}
-            
-            /* 翻转入场 */
-            .slide-flip {{
-                animation-name: slide-flip-anim;
-            }}
-            @keyframes slide-flip-anim {{
-                0% {{ opacity: 0; transform: perspective(800px) rotateX(-60deg) translateZ(-100px); }}
-                100% {{ opacity: 1; transform: perspective(800px) rotateX(0deg) translateZ(0); }}
-            }}
-            
-            /* 弹跳入场 */
-            .slide-bounce {{
-                animation-name: slide-bounce-anim;
-            }}
-            @keyframes slide-bounce-anim {{
-                0% {{ opacity: 0; transform: translateY(100px) scale(0.8); }}
-                60% {{ transform: translateY(-10px) scale(1.05); }}
-                100% {{ opacity: 1; transform: translateY(0) scale(1); }}
-            }}
-            
-            /* 模糊入场 (新) */
-            .slide-blur {{
-                animation-name: slide-blur-anim;
-            }}
-            @keyframes slide-blur-anim {{
-                0% {{ opacity: 0; filter: blur(20px); transform: scale(1.1); }}
-                100% {{ opacity: 1; filter: blur(0); transform: scale(1); }}
-            }}
-
-            /* 高级动画库 (Fallback Support) */
-            .anim-shiver {{ animation: shiver 0.2s linear infinite; }}
-            @keyframes shiver {{ 0% {{ transform: translate(1px, 1px); }} 100% {{ transform: translate(-1px, -1px); }} }}
-
-            .anim-slide-right {{ animation: slideRight 1s ease-out forwards; opacity: 0; transform: translateX(-50px); }}
-            @keyframes slideRight {{ to {{ opacity: 1; transform: translateX(0); }} }}
-
-            @keyframes magneticFlow {{ to {{ stroke-dashoffset: -20; }} }}
-            .anim-magnetic-flow {{ stroke-dasharray: 10, 5; animation: magneticFlow 1s linear infinite; }}
-        </style>
-        {''.join(slides)}
-    </svg>
-    """.strip()
+        """) + _STYLE_BLOCK
+
+
+def default_storyboard(topic: str) -> List[Dict[str, str]]:
+    return [
+        {"heading": topic, "body": "生成中，当前展示离线预览。"},
+        {"heading": "理解重点", "body": "联网后将出现 AI 驱动的互动动画。"},
+        {"heading": "下一步", "body": "填写密钥或导入离线资源即可体验完整效果。"},
+    ]
+
+
+def storyboard_to_svg(frames: Iterable[Dict[str, str]], frame_durations: List[float] | None = None) -> str:
+    frame_list = list(frames)
+    total_frames = len(frame_list)
+    
+    # 使用传入的实际音频时长，或默认6秒每帧
+    if frame_durations is None:
+        # 尝试从frame数据中获取时长
+        computed_durations = []
+        for frame in frame_list:
+            # 支持 'duration' 或 'seconds' 字段
+            d = frame.get("duration")
+            if d is None:
+                d = frame.get("seconds", 6.0)
+            computed_durations.append(float(d))
+        frame_durations = computed_durations
+    elif len(frame_durations) < total_frames:
+        # 如果时长列表不够，补齐到帧数
+        frame_durations = list(frame_durations) + [6.0] * (total_frames - len(frame_durations))
+    
+    total_duration = sum(frame_durations)
+    
+    # 定义多种动画效果样式
+    animation_styles = [
+        "slide-zoom",   # 缩放入场
+        "slide-rotate", # 旋转入场
+        "slide-flip",   # 翻转入场
+        "slide-bounce", # 弹跳入场
+        "slide-blur"    # 模糊入场
+    ]
+    
+    # 定义多种运镜效果 (Camera Moves)
+    camera_moves = [
+        "move-zoom-slow",
+        "move-pan-h",
+        "move-float"
+    ]
+    
+    # 进度指示器：圆点位置只与总帧数有关，每帧只切换高亮的那一个
+    # Center at 800. Offset = (i - (total_frames - 1) / 2) * spacing
+    dot_cxs = [800 + (i - (total_frames - 1) / 2) * 50 for i in range(total_frames)]
+    dot_dim = [f'<circle cx="{cx}" cy="820" r="8" fill="#4F46E5" opacity="0.3" />' for cx in dot_cxs]
+    dot_bright = [f'<circle cx="{cx}" cy="820" r="8" fill="#4F46E5" opacity="1" />' for cx in dot_cxs]
+
+    parts: List[str] = [_SVG_HEAD]
+    # 为不同帧选择不同的动画效果和运镜效果（循环取用，循环外一次排好）
+    animation_classes = islice(cycle(animation_styles), total_frames)
+    camera_classes = islice(cycle(camera_moves), total_frames)
+    for index, (frame, animation_class, camera_class) in enumerate(zip(frame_list, animation_classes, camera_classes)):
+        title = _esc(frame.get("heading", "瞬间"))
+        body = _esc(frame.get("body", ""))
+        narration = _esc(frame.get("narration", body))
+        
+        c = _SLIDE_CHUNKS
+        parts.extend((
+            c[0], str(index), c[1], animation_class, c[2], animation_class, c[3], camera_class,
+            c[4], title, c[5], body, c[6], narration, c[7],
+        ))
+        # 进度指示器 (不受运镜影响)
+        parts.extend(dot_dim[:index])
+        parts.append(dot_bright[index])
+        parts.extend(dot_dim[index + 1:])
+        parts.append(c[8])
+
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+@lru_cache(maxsize=64)
+def _default_svg(topic: str) -> str:
+    """默认分镜的 SVG 只取决于主题，渲染结果可以直接复用"""
+    return storyboard_to_svg(default_storyboard(topic))
 
 
 def guard_animation_markup(markup: str) -> tuple:
     """处理AI生成的动画内容，返回 (svg_html, storyboard)"""
-    print(f"[DEBUG] guard_animation_markup 接收内容长度: {len(markup)}")
-    lowered = markup.lower()
-    if "<script" in lowered or "javascript:" in lowered:
-        print(f"[DEBUG] 检测到脚本内容，使用默认动画")
-        default_frames = default_storyboard("主题")
-        return storyboard_to_svg(default_frames), default_frames
+    log.debug("guard_animation_markup 接收内容长度: %s", len(markup))
+    if _RE_DANGER.search(markup):
+        log.debug("检测到脚本内容，使用默认动画")
+        return _default_svg("主题"), default_storyboard("主题")
+    
+    # 快速路径：先用廉价的前缀判断，避免对干净的输入跑一遍元数据清理正则
+    stripped = markup.lstrip()
+    if stripped.startswith(("[", "{")):
+        # 纯 JSON 幻灯片数据，直接解析
+        frames = _parse_json_slides(markup)
+        if frames:
+            log.debug("JSON解析成功，帧数: %s", len(frames))
+            return storyboard_to_svg(frames), frames
     
-    # 清理AI的元说明文本
-    cleaned = _clean_ai_metadata(markup)
-    print(f"[DEBUG] 清理元数据后长度: {len(cleaned)}")
+    if stripped[:4].lower() == "<svg":
+        # 已经是干净的 SVG，无需清理
+        cleaned = markup
+    else:
+        # 清理AI的元说明文本
+        cleaned = _clean_ai_metadata(markup)
+        log.debug("清理元数据后长度: %s", len(cleaned))
     
     # 优先提取 SVG 代码（这才是我们想要的可视化效果）
     if "<svg" in cleaned.lower():
-        print(f"[DEBUG] 检测到SVG内容，开始提取")
+        log.debug("检测到SVG内容，开始提取")
         svg_content, storyboard = _extract_svg(cleaned)
         if svg_content:
-            print(f"[DEBUG] SVG提取成功，长度: {len(svg_content)}, storyboard帧数: {len(storyboard)}")
+            log.debug("SVG提取成功，长度: %s, storyboard帧数: %s", len(svg_content), len(storyboard))
             return svg_content, storyboard
         else:
-            print(f"[DEBUG] SVG提取失败")
+            log.debug("SVG提取失败")
     
     # 如果 AI 返回了 JSON 幻灯片数据（作为降级方案）
-    print(f"[DEBUG] 尝试解析JSON幻灯片")
+    log.debug("尝试解析JSON幻灯片")
     frames = _parse_json_slides(cleaned)
     if frames:
-        print(f"[DEBUG] JSON解析成功，帧数: {len(frames)}")
+        log.debug("JSON解析成功，帧数: %s", len(frames))
         return storyboard_to_svg(frames), frames
     
     # 最后尝试解析纯文本描述
-    print(f"[DEBUG] 尝试解析纯文本描述")
+    log.debug("尝试解析纯文本描述")
     frames = _parse_text_to_frames(cleaned)
     if frames:
-        print(f"[DEBUG] 文本解析成功，帧数: {len(frames)}")
+        log.debug("文本解析成功，帧数: %s", len(frames))
         return storyboard_to_svg(frames), frames
     
-    print(f"[DEBUG] 所有解析方法都失败，返回清理后的内容")
+    log.debug("所有解析方法都失败，返回清理后的内容")
     return cleaned.strip(), []
 
 
 def _parse_json_slides(text: str) -> List[Dict[str, str]]:
     """从 JSON 格式中提取幻灯片数据"""
-    import json
-    import re
-    
     try:
         # 1. 尝试提取 JSON 代码块 (支持 list [...] 或 object {...})
-        json_match = re.search(r'```json\s*([\[\{].*?[\]\}])\s*```', text, re.DOTALL)
+        json_match = _RE_JSON_BLOCK.search(text)
         json_str = ""
         
         if json_match:
             json_str = json_match.group(1)
         else:
             # 2. 直接查找 JSON 数组 [...]
-            json_match = re.search(r'^\s*\[\s*\{.*?\}\s*\]', text, re.DOTALL | re.MULTILINE)
+            json_match = _RE_JSON_ARRAY.search(text)
             if json_match:
                 json_str = json_match.group(0)
             else:
                 # 3. 直接查找包含 "slides" 的 JSON 对象
-                json_match = re.search(r'\{[^{}]*"slides"[^{}]*\[.*?\]\s*\}', text, re.DOTALL)
+                json_match = _RE_JSON_SLIDES.search(text)
                 if json_match:
                     json_str = json_match.group(0)
         
         if not json_str:
             return []
 
-        data = json.loads(json_str)
+        data = _json_loads(json_str)
         
         # 如果是列表，直接作为 slides
         if isinstance(data, list):
@@ -449,29 +550,15 @@ def _parse_json_slides(text: str) -> List[Dict[str, str]]:
         
         return frames if frames else []
     except Exception as e:
-        print(f"[WARN] JSON解析失败: {e}")
+        log.warning("JSON解析失败: %s", e)
         return []
 
 
 def _clean_ai_metadata(text: str) -> str:
     """移除AI的元说明和指令文本"""
-    import re
-    
-    # 移除常见的AI开场白
-    patterns = [
-        r'^好的[，,].*?(?=<svg|$)',  # "好的，作为..."
-        r'^作为.*?(?=<svg|$)',  # "作为一名..."
-        r'###\s*SVG\s*代码.*?```html',  # "### SVG 代码 ```html"
-        r'###\s*[^\n]*',  # 其他 ### 标题
-        r'```html\s*',  # ```html 标记
-        r'```\s*$',  # 结尾的 ```
-        r'^这段代码.*$',  # "这段代码可以..."
-        r'^\*\*.*?\*\*[:：]',  # **粗体标题**:
-    ]
-    
     result = text
-    for pattern in patterns:
-        result = re.sub(pattern, '', result, flags=re.MULTILINE | re.DOTALL)
+    for pattern in _RE_AI_METADATA:
+        result = pattern.sub('', result)
     
     return result.strip()
 
@@ -482,90 +569,79 @@ def _extract_svg(text: str) -> tuple:
     返回: (merged_svg, storyboard)
     storyboard格式: [{"heading": "标题", "body": "", "narration": "配音文字"}, ...]
     """
-    import re
-    
-    print(f"[DEBUG] _extract_svg 开始提取，文本长度: {len(text)}")
+    log.debug("_extract_svg 开始提取，文本长度: %s", len(text))
     
     # 0. 尝试优先解析 JSON Storyboard
     parsed_storyboard = _parse_json_slides(text)
     if parsed_storyboard:
-        print(f"[DEBUG] 成功解析到 JSON Storyboard，共 {len(parsed_storyboard)} 帧")
+        log.debug("成功解析到 JSON Storyboard，共 %s 帧", len(parsed_storyboard))
     
     # 查找所有 SVG 代码块（支持多分镜）
-    # 使用非贪婪匹配，但如果遇到截断（只有开始没有结束），findall会漏掉最后一个
-    # 所以我们手动遍历查找
-    svg_matches = []
-    
-    # 查找所有 <svg 标签的起始位置
-    start_indices = [m.start() for m in re.finditer(r'<svg[^>]*?>', text, re.IGNORECASE)]
-    
+    # 每个 <svg 的结束标签只在它与下一个 <svg 之间查找：中间某帧未闭合时不会一路吞到下一帧的 </svg>
+    # 如果遇到截断（只有开始没有结束），对最后一个单独修复闭合
+    # 每项为 (start, end, svg)，后面直接按位置切注释区域，无需再 text.find
+    svg_matches: List[tuple] = []
+    start_indices = [m.start() for m in _RE_SVG_START.finditer(text)]
     for i, start in enumerate(start_indices):
         # 确定搜索范围：从当前 <svg 开始，到下一个 <svg 之前（或文本末尾）
-        search_end = start_indices[i+1] if i + 1 < len(start_indices) else len(text)
-        chunk = text[start:search_end]
-        
-        # 在这个范围内查找结束标签 </svg>
-        end_match = re.search(r'</svg>', chunk, re.IGNORECASE)
-        
+        search_end = start_indices[i + 1] if i + 1 < len(start_indices) else len(text)
+        end_match = _RE_SVG_END.search(text, start, search_end)
         if end_match:
             # 完整闭合的 SVG
-            svg_content = chunk[:end_match.end()]
-            svg_matches.append(svg_content)
+            svg_matches.append((start, end_match.end(), text[start:end_match.end()]))
         elif i == len(start_indices) - 1:
             # 最后一个 SVG 且没有闭合 -> 判定为截断
-            print(f"[WARNING] 检测到最后一个 SVG 被截断，尝试自动修复闭合")
+            log.warning("检测到最后一个 SVG 被截断，尝试自动修复闭合")
             # 移除末尾可能的垃圾字符（如 `<` 或 `</`）
-            cleaned_chunk = chunk.rstrip()
+            cleaned_chunk = text[start:].rstrip()
             if cleaned_chunk.endswith("</"):
                 cleaned_chunk = cleaned_chunk[:-2]
             elif cleaned_chunk.endswith("<"):
                 cleaned_chunk = cleaned_chunk[:-1]
-                
+
             # 强制闭合
-            svg_matches.append(cleaned_chunk + "</g></svg>")
+            svg_matches.append((start, len(text), cleaned_chunk + "</g></svg>"))
         else:
             # 中间的 SVG 没有闭合？这通常是不正常的，可能是嵌套或格式错误
             # 尝试提取到下一个 <svg 之前
-            print(f"[WARNING] 中间的 SVG (索引 {i}) 似乎未闭合，尝试提取")
-            svg_matches.append(chunk + "</svg>")
+            log.warning("中间的 SVG (索引 %s) 似乎未闭合，尝试提取", i)
+            svg_matches.append((start, search_end, text[start:search_end] + "</svg>"))
 
     if not svg_matches:
-        print(f"[DEBUG] 未找到SVG代码块")
+        log.debug("未找到SVG代码块")
         return "", []
     
-    print(f"[DEBUG] 找到 {len(svg_matches)} 个SVG代码块")
+    log.debug("找到 %s 个SVG代码块", len(svg_matches))
     
     # 提取每个分镜的标题、配音和SVG内容
     frames = []
     storyboard = []
     
-    for idx, svg in enumerate(svg_matches):
-        # 获取当前SVG之前的文本（可能包含注释）
-        svg_start_pos = text.find(svg)
-        # 找到上一个SVG结束位置（如果存在）
-        prev_svg_end = 0
-        if idx > 0:
-            prev_svg_end = text.find(svg_matches[idx-1]) + len(svg_matches[idx-1])
-        
-        # 提取当前SVG之前的注释区域
+    prev_svg_end = 0
+    for idx, (svg_start_pos, svg_end_pos, svg) in enumerate(svg_matches):
+        # 提取当前SVG之前的注释区域（上一个SVG结束到当前SVG开始）
         comment_section = text[prev_svg_end:svg_start_pos]
+        prev_svg_end = svg_end_pos
         
-        # 查找分镜标题 <!-- 分镜X：标题 --> 或 <!-- 标题：... -->
-        # 优化正则：支持更多格式，且不强求"分镜"字样
-        title_match = re.search(r'<!--\s*(?:分镜\s*\d+|画面\s*\d+|Scene\s*\d+|Part\s*\d+|标题)\s*[：:]\s*([^-]+?)\s*-->', comment_section, re.IGNORECASE)
-        # 如果找不到特定格式，尝试查找任意 "标题：xxx"
-        if not title_match:
-             title_match = re.search(r'<!--\s*Title\s*[：:]\s*([^-]+?)\s*-->', comment_section, re.IGNORECASE)
-             
+        # 一次扫描注释区域，取第一个标题和第一个配音
+        # 分镜/画面/标题等特定格式优先，找不到时才使用 "Title：xxx"
         # 默认标题为空，避免出现"分镜"字样
-        title = title_match.group(1).strip() if title_match else ""
-        
-        # 查找配音文字 <!-- 配音：文字 --> 或 <!-- Voiceover: Text -->
-        narration_match = re.search(r'<!--\s*(?:配音|Voiceover|Narration|Audio)\s*[：:]\s*([^-]+?)\s*-->', comment_section, re.IGNORECASE)
-        narration = narration_match.group(1).strip() if narration_match else ""
+        title = ""
+        fallback_title = ""
+        narration = ""
+        for meta in _RE_META.finditer(comment_section):
+            if meta.group("narration") is not None:
+                narration = narration or meta.group("narration").strip()
+            elif meta.group("title_kind").lower() == "title":
+                fallback_title = fallback_title or meta.group("title").strip()
+            elif not title:
+                title = meta.group("title").strip()
+            if title and narration:
+                break
+        title = title or fallback_title
         
         # 优化：移除字幕开头和结尾的标点符号
-        narration = re.sub(r'^[^\w\s]+|[^\w\s]+$', '', narration)
+        narration = _RE_TRIM_PUNCT.sub('', narration)
         
         # 优先使用 JSON Storyboard 中的数据 (如果匹配)
         if parsed_storyboard and idx < len(parsed_storyboard):
@@ -575,9 +651,9 @@ def _extract_svg(text: str) -> tuple:
             if json_frame.get("narration"):
                 narration = json_frame["narration"]
                 # Clean narration from JSON too just in case
-                narration = re.sub(r'^[^\w\s]+|[^\w\s]+$', '', narration)
+                narration = _RE_TRIM_PUNCT.sub('', narration)
         
-        print(f"[DEBUG] 分镜 {idx+1}: 标题={title}, 配音={narration[:30]}..., SVG长度={len(svg)}")
+        log.debug("分镜 %s: 标题=%s, 配音=%.30s..., SVG长度=%s", idx + 1, title, narration, len(svg))
         
         frames.append({
             "svg": svg.replace('\\n', '\n').replace('\\t', '\t').replace('\\r', ''),
@@ -591,40 +667,15 @@ def _extract_svg(text: str) -> tuple:
         })
     
     # 如果只有一个SVG，也通过合并逻辑处理，以确保添加 frame-id 和标准化结构
-    # if len(svg_matches) == 1:
-    #    svg_code = svg_matches[0].replace('\\n', '\n').replace('\\t', '\t').replace('\\r', '')
-    #    print(f"[DEBUG] 单个SVG，长度: {len(svg_code)}")
-    #    return svg_code, storyboard
-    
     # 合并多个SVG为序列动画
-    print(f"[DEBUG] 开始合并 {len(frames)} 个SVG分镜")
+    log.debug("开始合并 %s 个SVG分镜", len(frames))
     merged = _merge_svg_frames(frames)
-    print(f"[DEBUG] 合并后SVG长度: {len(merged)}")
+    log.debug("合并后SVG长度: %s", len(merged))
     return merged, storyboard
 
 
-def _merge_svg_frames(frames: List[Dict[str, str]], frame_durations: List[float] | None = None) -> str:
-    """将多个SVG分镜合并为电影级序列动画"""
-    print(f"[DEBUG] _merge_svg_frames 开始合并，帧数: {len(frames)}")
-    if not frames:
-        print(f"[DEBUG] 帧列表为空，返回空字符串")
-        return ""
-    
-    total_frames = len(frames)
-    
-    # 使用传入的实际音频时长，或默认8秒每帧
-    if frame_durations is None:
-        frame_durations = [8.0] * total_frames
-    elif len(frame_durations) < total_frames:
-        frame_durations = list(frame_durations) + [8.0] * (total_frames - len(frame_durations))
-    
-    total_duration = sum(frame_durations)
-    print(f"[DEBUG] 总时长: {total_duration}秒")
-    
-    # 构建包含所有分镜的SVG (1600x900 HD Standard)
-    # Using Standard Coordinate System: (0,0) Top-Left, (800,450) Center
-    merged_svg = """<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 1600 900" class="storyboard">
-    <defs>
+# 合并分镜共用的滤镜库，模块加载时创建一次
+_MERGED_DEFS: Final[str] = """<defs>
         <filter id="blur-transition">
             <feGaussianBlur in="SourceGraphic" stdDeviation="0">
                 <animate attributeName="stdDeviation" values="0;8;0" dur="1.5s" repeatCount="indefinite" />
@@ -724,7 +775,11 @@ def _merge_svg_frames(frames: List[Dict[str, str]], frame_durations: List[float]
                 <feMergeNode in="SourceGraphic"/>
             </feMerge>
         </filter>
-    </defs>
+    </defs>"""
+
+
+# 合并分镜的样式表（关键帧 + 工具类），纯静态文本
+_KEYFRAMES_CSS: Final[str] = """
     <style>
         .storyboard { background: transparent; font-family: 'Segoe UI', 'Microsoft YaHei', sans-serif; }
         .frame { display: none; }
@@ -732,27 +787,14 @@ def _merge_svg_frames(frames: List[Dict[str, str]], frame_durations: List[float]
         @keyframes fadeIn { from { opacity: 0; } to { opacity: 1; } }
 
         /* 通用动画库 */
-        .anim-float { animation: float 3s ease-in-out infinite; }
+        /* float 关键帧不再被工具类使用，保留给分镜内联样式按名字引用 */
         @keyframes float { 0%, 100% { transform: translateY(0); } 50% { transform: translateY(-10px); } }
 
-        .anim-pulse { animation: pulse 2s ease-in-out infinite; }
-        @keyframes pulse { 0%, 100% { transform: scale(1); opacity: 1; } 50% { transform: scale(1.05); opacity: 0.8; } }
-
         .anim-spin { animation: spin 10s linear infinite; transform-origin: center; }
-        @keyframes spin { 100% { transform: rotate(360deg); } }
-
-        .anim-spin-fast { animation: spin 2s linear infinite; transform-origin: center; }
-        .anim-spin-slow { animation: spin 30s linear infinite; transform-origin: center; }
 
         .anim-drift { animation: drift 5s ease-in-out infinite alternate; }
         @keyframes drift { from { transform: translateX(-5px); } to { transform: translateX(5px); } }
         
-        .anim-shake { animation: shake 0.5s linear infinite; }
-        @keyframes shake { 0% { transform: translate(1px, 1px) rotate(0deg); } 10% { transform: translate(-1px, -2px) rotate(-1deg); } 20% { transform: translate(-3px, 0px) rotate(1deg); } 30% { transform: translate(3px, 2px) rotate(0deg); } 40% { transform: translate(1px, -1px) rotate(1deg); } 50% { transform: translate(-1px, 2px) rotate(-1deg); } 60% { transform: translate(-3px, 1px) rotate(0deg); } 70% { transform: translate(3px, 1px) rotate(-1deg); } 80% { transform: translate(-1px, -1px) rotate(1deg); } 90% { transform: translate(1px, 2px) rotate(0deg); } 100% { transform: translate(1px, -2px) rotate(-1deg); } }
-
-        .anim-bounce { animation: bounce 2s infinite; }
-        @keyframes bounce { 0%, 20%, 50%, 80%, 100% {transform: translateY(0);} 40% {transform: translateY(-30px);} 60% {transform: translateY(-15px);} }
-        
         .anim-flash { animation: flash 1s infinite; }
         @keyframes flash { 0%, 50%, 100% { opacity: 1; } 25%, 75% { opacity: 0; } }
 
@@ -801,31 +843,36 @@ def _merge_svg_frames(frames: List[Dict[str, str]], frame_durations: List[float]
             100% { transform: translate(0,0) rotate(0deg); } 
         }
 
-            /* Object Action Utility Classes */
-            .anim-spin-slow { animation: spin 30s linear infinite; transform-origin: center center; transform-box: fill-box; }
-            .anim-spin-fast { animation: spin 2s linear infinite; transform-origin: center center; transform-box: fill-box; }
-            .anim-bounce { animation: bounce 1s ease-in-out infinite; transform-origin: center center; transform-box: fill-box; }
-            .anim-shake { animation: shake 0.5s linear infinite; transform-origin: center center; transform-box: fill-box; }
-            .anim-pulse { animation: pulse 2s ease-in-out infinite; transform-origin: center center; transform-box: fill-box; }
-            .anim-float { animation: floatObj 3s ease-in-out infinite; transform-origin: center center; transform-box: fill-box; }
-
-            @keyframes spin { from { transform: rotate(0deg); } to { transform: rotate(360deg); } }
-            @keyframes bounce { 0%, 100% { transform: translateY(0); } 50% { transform: translateY(-20px); } }
-            @keyframes shake { 
-                0% { transform: translate(1px, 1px) rotate(0deg); }
-                10% { transform: translate(-1px, -2px) rotate(-1deg); }
-                20% { transform: translate(-3px, 0px) rotate(1deg); }
-                30% { transform: translate(3px, 2px) rotate(0deg); }
-                40% { transform: translate(1px, -1px) rotate(1deg); }
-                50% { transform: translate(-1px, 2px) rotate(-1deg); }
-                60% { transform: translate(-3px, 1px) rotate(0deg); }
-                70% { transform: translate(3px, 1px) rotate(-1deg); }
-                80% { transform: translate(-1px, -1px) rotate(1deg); }
-                90% { transform: translate(1px, 2px) rotate(0deg); }
-                100% { transform: translate(1px, -2px) rotate(-1deg); }
-            }
-            @keyframes pulse { 0% { transform: scale(1); } 50% { transform: scale(1.05); } 100% { transform: scale(1); } }
-            @keyframes floatObj { 0% { transform: translateY(0px); } 50% { transform: translateY(-10px); } 100% { transform: translateY(0px); } }
+        /* 物体动作类：与上面的通用动画同名时以这里为准（原先重复定义两次，后者覆盖前者） */
+        .anim-spin-slow, .anim-spin-fast, .anim-bounce, .anim-shake, .anim-pulse, .anim-float { transform-origin: center center; transform-box: fill-box; }
+        .anim-spin-slow { animation: spin 30s linear infinite; }
+        .anim-spin-fast { animation: spin 2s linear infinite; }
+        .anim-bounce { animation: bounce 1s ease-in-out infinite; }
+        .anim-shake { animation: shake 0.5s linear infinite; }
+        .anim-pulse { animation: pulse 2s ease-in-out infinite; }
+        .anim-float { animation: floatObj 3s ease-in-out infinite; }
+
+        @keyframes spin { from { transform: rotate(0deg); } to { transform: rotate(360deg); } }
+        @keyframes bounce { 0%, 100% { transform: translateY(0); } 50% { transform: translateY(-20px); } }
+        @keyframes shake { 
+            0% { transform: translate(1px, 1px) rotate(0deg); }
+            10% { transform: translate(-1px, -2px) rotate(-1deg); }
+            20% { transform: translate(-3px, 0px) rotate(1deg); }
+            30% { transform: translate(3px, 2px) rotate(0deg); }
+            40% { transform: translate(1px, -1px) rotate(1deg); }
+            50% { transform: translate(-1px, 2px) rotate(-1deg); }
+            60% { transform: translate(-3px, 1px) rotate(0deg); }
+            70% { transform: translate(3px, 1px) rotate(-1deg); }
+            80% { transform: translate(-1px, -1px) rotate(1deg); }
+            90% { transform: translate(1px, 2px) rotate(0deg); }
+            100% { transform: translate(1px, -2px) rotate(-1deg); }
+        }
+        @keyframes pulse { 0% { transform: scale(1); } 50% { transform: scale(1.05); } 100% { transform: scale(1); } }
+        @keyframes floatObj { 0% { transform: translateY(0px); } 50% { transform: translateY(-10px); } 100% { transform: translateY(0px); } }
+
+        /* 合成层提示：只给做 transform 动画的类开启，避免全局提升图层占用显存 */
+        .anim-float, .anim-pulse, .anim-spin, .anim-spin-fast, .anim-spin-slow, .anim-drift, .anim-shake, .anim-bounce, .anim-shiver,
+        .camera-zoom-in, .camera-zoom-out, .camera-pan-right, .camera-pan-left, .camera-pan-up, .camera-float { will-change: transform; }
 
         /* 延迟辅助类 */
         .delay-200 { animation-delay: 0.2s; }
@@ -835,59 +882,127 @@ def _merge_svg_frames(frames: List[Dict[str, str]], frame_durations: List[float]
         .delay-2000 { animation-delay: 2s; }
     </style>
 """
+
+@lru_cache(maxsize=64)
+def _viewbox_to_transform(viewbox: str) -> str:
+    """把分镜的 viewBox 映射到标准 1600x900 画布，返回 transform 属性；无需变换时返回空串
+
+    AI 生成的分镜大多共用同一个 viewBox，按属性值缓存，每种只计算一次
+    """
+    try:
+        vb_values = [float(x) for x in viewbox.replace(",", " ").split()]
+        if len(vb_values) != 4:
+            return ""
+        vx, vy, vw, vh = vb_values
+        target_w, target_h = 1600, 900
+        
+        # 如果 viewBox 与目标尺寸差异较大，或者有偏移，则应用归一化变换
+        # Target is Standard 1600x900 (0,0 to 1600,900)
+        if abs(vw - target_w) > 1 or abs(vh - target_h) > 1 or abs(vx - 0) > 1 or abs(vy - 0) > 1:
+            # 计算缩放比例 (保持纵横比，'meet' 模式，确保内容完整显示)
+            scale_x = target_w / vw
+            scale_y = target_h / vh
+            scale = min(scale_x, scale_y)
+            
+            # 计算居中偏移
+            # We want the visual center of the content to land at (800, 450)
+            # Center of source viewBox: cx = vx + vw/2, cy = vy + vh/2
+            # We map (cx, cy) to (800, 450)
+            # transform = translate(tx, ty) scale(s)
+            # 800 = s * cx + tx  => tx = 800 - s * cx
+            
+            src_cx = vx + vw / 2
+            src_cy = vy + vh / 2
+            
+            tx = 800 - scale * src_cx
+            ty = 450 - scale * src_cy
+            
+            log.debug("坐标标准化: viewBox=%s,%s,%s,%s -> scale=%.3f, offset=(%.1f,%.1f)", vx, vy, vw, vh, scale, tx, ty)
+            return f'transform="translate({tx:.2f}, {ty:.2f}) scale({scale:.2f})"'
+    except Exception as e:
+        log.warning("viewBox 解析失败: %s", e)
+    return ""
+
+
+_RE_SVG_OPEN_TAG: Final = re.compile(r"<svg[^>]*>", re.IGNORECASE)
+_RE_SVG_CLOSE_TAG: Final = re.compile(r"</svg>", re.IGNORECASE)
+
+
+def _extract_svg_inner(svg_content: str) -> str:
+    """去除外层 <svg> 标签，返回内部内容；没有完整的开闭标签时原样返回
+
+    用预编译的大小写不敏感正则分别定位开标签和最后一个闭标签，
+    不做整段小写拷贝，也避免 DOTALL 正则跨整段回溯
+    """
+    open_match = _RE_SVG_OPEN_TAG.search(svg_content)
+    if open_match is None:
+        return svg_content
+    close_start = -1
+    for match in _RE_SVG_CLOSE_TAG.finditer(svg_content, open_match.end()):
+        close_start = match.start()
+    if close_start < 0:
+        return svg_content
+    return svg_content[open_match.end():close_start]
+
+
+# 分镜未自带运镜时轮流套用的运镜类
+_CAM_TYPES: Final[tuple[str, ...]] = ("camera-zoom-in", "camera-zoom-out", "camera-pan-right", "camera-pan-left")
+_CAMERA_PROBE_LEN: Final[int] = 4096
+
+# 单个分镜的包装模板，循环里只做两处替换
+_FRAME_TMPL: Final[str] = """
+        <g class="frame" id="frame-{i}">
+            <!-- 分镜内容（自动运镜类直接挂在这一层，不再额外包一层） -->
+            <g{camera_attr}>
+                {body}
+            </g>
+        </g>
+        """
+
+
+def _merge_svg_frames(frames: List[Dict[str, str]], frame_durations: List[float] | None = None) -> str:
+    """将多个SVG分镜合并为电影级序列动画"""
+    return "".join(iter_merged_svg(frames, frame_durations)).strip()
+
+
+def iter_merged_svg(frames: List[Dict[str, str]], frame_durations: List[float] | None = None) -> Iterator[str]:
+    """逐段产出合并后的分镜 SVG（头部、样式、每个分镜、结尾）
+
+    写文件或 HTTP 响应时可以直接流式输出，无需先拼出完整字符串
+    """
+    log.debug("iter_merged_svg 开始合并，帧数: %s", len(frames))
+    if not frames:
+        log.debug("帧列表为空，不产出内容")
+        return
+    
+    total_frames = len(frames)
     
-    cumulative_delay = 0
+    # 使用传入的实际音频时长，或默认8秒每帧
+    if frame_durations is None:
+        frame_durations = [8.0] * total_frames
+    elif len(frame_durations) < total_frames:
+        frame_durations = list(frame_durations) + [8.0] * (total_frames - len(frame_durations))
+    
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("总时长: %s秒", sum(frame_durations))
+    
+    # 构建包含所有分镜的SVG (1600x900 HD Standard)
+    # Using Standard Coordinate System: (0,0) Top-Left, (800,450) Center
+    yield """<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 1600 900" class="storyboard">
+    """
+    yield _MERGED_DEFS
+    yield _KEYFRAMES_CSS
+    
+    viewbox_search = _VIEWBOX_RE.search
     for index, frame_data in enumerate(frames):
-        delay = cumulative_delay
-        current_duration = frame_durations[index]
         svg_content = frame_data["svg"]
-        title = frame_data.get("title", f"第{index+1}帧")
-        
-        # 提取SVG内容（去除外层svg标签）
-        import re
-        
-        # 1. 尝试提取 viewBox 以进行坐标标准化
-        viewbox_match = re.search(r'viewBox=["\']([\d\s\.\-,]+)["\']', svg_content, re.IGNORECASE)
-        normalization_transform = ""
         
-        if viewbox_match:
-            try:
-                vb_values = [float(x) for x in re.split(r'[\s,]+', viewbox_match.group(1).strip()) if x]
-                if len(vb_values) == 4:
-                    vx, vy, vw, vh = vb_values
-                    target_w, target_h = 1600, 900
-                    
-                    # 如果 viewBox 与目标尺寸差异较大，或者有偏移，则应用归一化变换
-                    # Target is Standard 1600x900 (0,0 to 1600,900)
-                    if abs(vw - target_w) > 1 or abs(vh - target_h) > 1 or abs(vx - 0) > 1 or abs(vy - 0) > 1:
-                        # 计算缩放比例 (保持纵横比，'meet' 模式，确保内容完整显示)
-                        scale_x = target_w / vw
-                        scale_y = target_h / vh
-                        scale = min(scale_x, scale_y)
-                        
-                        # 计算居中偏移
-                        # We want the visual center of the content to land at (800, 450)
-                        # Center of source viewBox: cx = vx + vw/2, cy = vy + vh/2
-                        # We map (cx, cy) to (800, 450)
-                        # transform = translate(tx, ty) scale(s)
-                        # 800 = s * cx + tx  => tx = 800 - s * cx
-                        
-                        src_cx = vx + vw / 2
-                        src_cy = vy + vh / 2
-                        
-                        tx = 800 - scale * src_cx
-                        ty = 450 - scale * src_cy
-                        
-                        normalization_transform = f'transform="translate({tx:.2f}, {ty:.2f}) scale({scale:.2f})"'
-                        print(f"[DEBUG] 帧 {index+1} 坐标标准化: viewBox={vx},{vy},{vw},{vh} -> scale={scale:.3f}, offset=({tx:.1f},{ty:.1f})")
-            except Exception as e:
-                print(f"[WARN] viewBox 解析失败: {e}")
-
-        content_match = re.search(r'<svg[^>]*?>(.*)</svg>', svg_content, re.DOTALL | re.IGNORECASE)
-        if content_match:
-            inner_content = content_match.group(1)
-        else:
-            inner_content = svg_content
+        # 1. 尝试提取 viewBox 以进行坐标标准化（同一 viewBox 的结果会被缓存）
+        viewbox_match = viewbox_search(svg_content)
+        normalization_transform = _viewbox_to_transform(viewbox_match.group(1)) if viewbox_match else ""
+
+        # 2. 提取SVG内容（去除外层svg标签）
+        inner_content = _extract_svg_inner(svg_content)
             
         # 如果需要标准化，包裹一层 Group
         if normalization_transform:
@@ -895,39 +1010,28 @@ def _merge_svg_frames(frames: List[Dict[str, str]], frame_durations: List[float]
         
         # 智能运镜系统：如果内容中没有检测到运镜类，自动添加
         # 这确保了画面永远不会静止
-        camera_class = ""
-        if "camera-" not in inner_content:
+        # 运镜类只会出现在靠近根部的 class 属性里，只检查开头一段
+        camera_attr = ""
+        if inner_content.find("camera-", 0, _CAMERA_PROBE_LEN) == -1:
             # 简单的伪随机选择
-            cam_types = ["camera-zoom-in", "camera-zoom-out", "camera-pan-right", "camera-pan-left"]
-            camera_class = cam_types[index % len(cam_types)]
-            # 包装一层Group来应用运镜
-            inner_content = f'<g class="{camera_class}">{inner_content}</g>'
+            camera_attr = f' class="{_CAM_TYPES[index % len(_CAM_TYPES)]}"'
         
         # 为每个分镜添加ID，供JS控制显示
-        merged_svg += f"""
-        <g class="frame" id="frame-{index}">
-            <!-- 分镜内容 -->
-            <g>
-                {inner_content}
-            </g>
-        </g>
-        """
-        
-        # 累加当前帧的时长
-        cumulative_delay += current_duration
+        yield _FRAME_TMPL.format(i=index, camera_attr=camera_attr, body=inner_content)
     
-    merged_svg += "\n    </svg>"
-    return merged_svg.strip()
+    yield "\n    </svg>"
 
 
 def _parse_text_to_frames(text: str) -> List[Dict[str, str]]:
     """将 AI 返回的文本描述解析为幻灯片帧"""
     frames = []
     
+    # 限制输入长度，避免超长文本拖慢分段（最多也只取 20 帧）
+    if len(text) > _MAX_TEXT_PARSE_LEN:
+        text = text[:_MAX_TEXT_PARSE_LEN]
+    
     # 尝试按数字编号分割（1. 2. 3. 或 一、二、三、等）
-    import re
-    # 匹配 "1." "2." 或 "一、" "二、" 等格式
-    sections = re.split(r'(?:\d+\.|[一二三四五六七八九十]+、)', text)
+    sections = _SECTION_RE.split(text)
     sections = [s.strip() for s in sections if s.strip()]
     
     if len(sections) >= 2:
@@ -939,8 +1043,8 @@ def _parse_text_to_frames(text: str) -> List[Dict[str, str]]:
     
     # 如果解析失败，按段落分割
     if not frames:
-        paragraphs = [p.strip() for p in text.split('\n\n') if p.strip()]
-        for i, para in enumerate(paragraphs[:15]):
+        paragraphs = (p.strip() for p in text.split('\n\n') if p.strip())
+        for i, para in enumerate(islice(paragraphs, 15)):
             lines = para.split('\n', 1)
             heading = lines[0][:30] if lines else f"要点 {i+1}"
             body = lines[1][:150] if len(lines) > 1 else para[:150]
@@ -4,24 +4,39 @@ from typing import Any, Dict, List
 
 
 class GraphBuilder:
-    def __init__(self) -> None:
-        self._fallback_edges = [
-            {"from": "topic", "to": "concept", "label": "涵盖"},
-            {"from": "topic", "to": "application", "label": "应用"},
-            {"from": "topic", "to": "extension", "label": "延伸"},
-        ]
+    # 默认图谱的静态结构，只在需要时才展开成字典
+    # (id, label, group, color)，label 为 None 的节点使用主题名
+    _DEFAULT_NODE_SPECS = (
+        ("topic", None, 1, "#4F46E5"),
+        ("concept", "核心概念", 2, "#818CF8"),
+        ("application", "实践场景", 3, "#A5B4FC"),
+        ("extension", "延伸知识", 4, "#C7D2FE"),
+    )
+    # (from, to, label)
+    _DEFAULT_EDGE_SPECS = (
+        ("topic", "concept", "涵盖"),
+        ("topic", "application", "应用"),
+        ("topic", "extension", "延伸"),
+    )
 
     def default_graph(self, topic: str) -> Dict[str, Any]:
         return {
-            "nodes": [
-                {"id": "topic", "label": topic, "group": 1, "color": "#4F46E5"},
-                {"id": "concept", "label": "核心概念", "group": 2, "color": "#818CF8"},
-                {"id": "application", "label": "实践场景", "group": 3, "color": "#A5B4FC"},
-                {"id": "extension", "label": "延伸知识", "group": 4, "color": "#C7D2FE"},
-            ],
-            "edges": list(self._fallback_edges),
+            "nodes": self._default_nodes(topic),
+            "edges": self._default_edges(),
         }
 
+    def _default_nodes(self, topic: str) -> List[Dict[str, Any]]:
+        return [
+            {"id": node_id, "label": label or topic, "group": group, "color": color}
+            for node_id, label, group, color in self._DEFAULT_NODE_SPECS
+        ]
+
+    def _default_edges(self) -> List[Dict[str, Any]]:
+        return [
+            {"from": source, "to": target, "label": label}
+            for source, target, label in self._DEFAULT_EDGE_SPECS
+        ]
+
     def normalise(self, payload: Dict[str, Any], topic: str) -> Dict[str, Any]:
         nodes: List[Dict[str, Any]] = []
         raw_nodes = payload.get("nodes")
@@ -54,11 +69,10 @@ class GraphBuilder:
                 label = str(item.get("label") or "关联")[:12]
                 edges.append({"from": str(source), "to": str(target), "label": label})
 
-        if not nodes or not edges:
-            default_graph = self.default_graph(topic)
-            if not nodes:
-                nodes = default_graph["nodes"]
-            if not edges:
-                edges = default_graph["edges"]
+        # 只补齐缺失的部分，不再为另一半构建用不到的默认结构
+        if not nodes:
+            nodes = self._default_nodes(topic)
+        if not edges:
+            edges = self._default_edges()
 
         return {"nodes": nodes, "edges": edges}
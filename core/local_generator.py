@@ -19,8 +19,10 @@ except ImportError:
     from graph_builder import GraphBuilder
     from utils import slugify
 
+_TOPIC_SPLIT_RE = re.compile(r"[：:，,。；;、\s]+")
+_CJK_RE = re.compile(r'[\u4e00-\u9fa5]{2,}')  # 匹配两个字以上的中文词
 
-@dataclass
+@dataclass(slots=True)
 class LocalStorySettings:
     max_keywords: int = 5
     min_frames: int = 4
@@ -142,35 +144,39 @@ class LocalGenerator:
         return frames
 
     def _extract_keywords(self, topic: str, graph_data: Dict[str, Any] | None) -> List[str]:
+        max_keywords = self.settings.max_keywords
         keywords: List[str] = []
         if isinstance(graph_data, dict):
             nodes = graph_data.get("nodes")
             if isinstance(nodes, Sequence):
+                seen: set[str] = set()
                 for node in nodes:
+                    if len(keywords) >= max_keywords:
+                        break
                     if not isinstance(node, dict):
                         continue
                     label = str(node.get("label") or "").strip()
-                    if not label or label == topic:
+                    if not label or label == topic or label in seen:
                         continue
-                    if label not in keywords:
-                        keywords.append(label)
+                    seen.add(label)
+                    keywords.append(label)
         if not keywords:
-            tokens = self._split_topic(topic)
-            keywords.extend(tokens[: self.settings.max_keywords])
-        return keywords[: self.settings.max_keywords]
+            keywords = self._split_topic(topic)[:max_keywords]
+        return keywords
 
     def _split_topic(self, topic: str) -> List[str]:
-        cleaned = re.sub(r"[：:，,。；;、\s]+", " ", topic)
+        cleaned = _TOPIC_SPLIT_RE.sub(" ", topic)
         tokens = [token.strip() for token in cleaned.split(" ") if token.strip()]
         if not tokens and topic:
             tokens = list(topic)
         return tokens
 
     def _derive_relations(self, keywords: Sequence[str]) -> List[str]:
-        relations: List[str] = []
-        for a, b in itertools.pairwise(keywords):
-            relations.append(f"{a} 与 {b} 之间存在互相支撑的关系")
-        return relations[:3]
+        # 只需要前 3 组关系，提前截断避免遍历全部关键词对
+        return [
+            f"{a} 与 {b} 之间存在互相支撑的关系"
+            for a, b in itertools.islice(itertools.pairwise(keywords), 3)
+        ]
 
     def _padding_frames(self, topic: str, existing: int) -> List[Dict[str, str]]:
         extras: List[Dict[str, str]] = []
@@ -192,62 +198,45 @@ class LocalGenerator:
         return extras
 
     def _build_graph(self, topic: str, storyboard: Iterable[Dict[str, str]]) -> Dict[str, Any]:
-        # 获取默认图谱结构作为基础
+        # 获取默认图谱结构作为基础（每次调用都是新列表，可直接拼接）
         default_graph = self.graph_builder.default_graph(topic)
-        nodes = default_graph["nodes"].copy()
-        edges = default_graph["edges"].copy()
-        
-        # 从故事板中提取关键词，丰富图谱内容
-        keywords = []
-        for frame in storyboard:
-            if "body" in frame:
-                body_text = frame["body"]
-                # 简单提取关键词
-                words = re.findall(r'[\u4e00-\u9fa5]+', body_text)  # 匹配中文字符
-                keywords.extend([word for word in words if len(word) > 1 and word != topic])
         
-        # 去重并取前几个关键词
-        unique_keywords = list(dict.fromkeys(keywords))[:8]
+        # 从故事板中提取关键词，丰富图谱内容（长度过滤交给正则，去重后取前几个）
+        unique_keywords = list(dict.fromkeys(
+            word
+            for frame in storyboard
+            for word in _CJK_RE.findall(frame.get("body", ""))
+            if word != topic
+        ))[:8]
         
-        # 添加关键词节点
+        # 关键词节点：默认图谱的节点 ID 固定，keyword_N 不会与之冲突
         keyword_group = 5
-        for i, keyword in enumerate(unique_keywords):
-            node_id = f"keyword_{i+1}"
-            # 确保节点ID唯一
-            suffix = 1
-            original_id = node_id
-            while any(node["id"] == node_id for node in nodes):
-                node_id = f"{original_id}_{suffix}"
-                suffix += 1
-            
-            nodes.append({
-                "id": node_id,
-                "label": keyword,
-                "group": keyword_group,
-                "color": "#8B5CF6"
-            })
-            
-            # 随机连接到主题或核心节点
+        keyword_nodes = [
+            {"id": f"keyword_{i+1}", "label": keyword, "group": keyword_group, "color": "#8B5CF6"}
+            for i, keyword in enumerate(unique_keywords)
+        ]
+        
+        # 随机连接到主题或核心节点
+        core_nodes = [node["id"] for node in default_graph["nodes"] if node["id"] in {"concept", "application", "extension"}]
+        keyword_edges = []
+        for i, node in enumerate(keyword_nodes):
             if i % 2 == 0:
-                edges.append({"from": "topic", "to": node_id, "label": "包含"})
-            else:
+                keyword_edges.append({"from": "topic", "to": node["id"], "label": "包含"})
+            elif core_nodes:
                 # 随机选择一个核心节点连接
-                core_nodes = [node["id"] for node in nodes if node["id"] in ["concept", "application", "extension"]]
-                if core_nodes:
-                    target_node = core_nodes[i % len(core_nodes)]
-                    edges.append({"from": target_node, "to": node_id, "label": "相关"})
+                keyword_edges.append({"from": core_nodes[i % len(core_nodes)], "to": node["id"], "label": "相关"})
         
-        return {"nodes": nodes, "edges": edges}
+        return {
+            "nodes": default_graph["nodes"] + keyword_nodes,
+            "edges": default_graph["edges"] + keyword_edges,
+        }
 
     def _compose_narration(self, topic: str, storyboard: Sequence[Dict[str, str]]) -> str:
-        segments: List[str] = []
         intro = f"现在带你快速浏览 {topic} 的知识图景。"
-        segments.append(intro)
-        for frame in storyboard:
-            heading = frame.get("heading") or "要点"
-            body = frame.get("body") or ""
-            sentence = f"【{heading}】{body}"
-            segments.append(sentence)
         outro = "以上内容可以作为进一步拓展的起点，欢迎继续探索。"
-        segments.append(outro)
-        return "\n".join(segments)
+        # 空标题/正文同样回退到默认值，所以保留 `or` 而不是 get 默认参数
+        return "\n".join(itertools.chain(
+            (intro,),
+            (f"【{frame.get('heading') or '要点'}】{frame.get('body') or ''}" for frame in storyboard),
+            (outro,),
+        ))
@@ -1,73 +1,254 @@
 from __future__ import annotations
 
+import asyncio
+import atexit
+import binascii
+import hashlib
+import logging
+import os
+import queue
+import re
+import shutil
+import ssl
+import subprocess
+import sys
 import tempfile
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence
-
-try:  # PIL may not be present until requirements are installed
-    from PIL import Image, ImageDraw, ImageFont
-except Exception as exc:  # noqa: BLE001
-    Image = None  # type: ignore[assignment]
-    ImageDraw = None  # type: ignore[assignment]
-    ImageFont = None  # type: ignore[assignment]
-
-try:  # numpy may not be present until requirements are installed
-    import numpy as np
-except Exception as exc:  # noqa: BLE001
-    np = None  # type: ignore[assignment]
-
-try:  # moviepy may not be present until requirements are installed
-    # Try moviepy 2.x imports first (top level)
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+# PIL / numpy / moviepy 导入很慢（moviepy 还会连带加载 imageio、proglog 等），推迟到第一次真正渲染时再导入。
+# 模块级名字先占位为 None，由 _load_pil / _load_moviepy 填充，原有的 `X is None` 判断照常生效
+Image = ImageDraw = ImageFont = None  # type: ignore[assignment]
+np = None  # type: ignore[assignment]
+AudioFileClip = ImageClip = concatenate_videoclips = None  # type: ignore[assignment]
+AudioClip = concatenate_audioclips = AudioArrayClip = None  # type: ignore[assignment]
+_moviepy_error: Optional[Exception] = None
+
+
+@lru_cache(maxsize=1)
+def _load_pil() -> bool:
+    """按需导入 PIL，填充模块级的 Image / ImageDraw / ImageFont"""
+    global Image, ImageDraw, ImageFont
+    try:  # PIL may not be present until requirements are installed
+        from PIL import Image, ImageDraw, ImageFont
+    except Exception:  # noqa: BLE001
+        return False
+    return True
+
+
+@lru_cache(maxsize=1)
+def _load_moviepy() -> bool:
+    """按需导入 numpy 与 moviepy，填充模块级的剪辑类和拼接函数"""
+    global np, AudioFileClip, ImageClip, concatenate_videoclips, AudioClip, concatenate_audioclips, AudioArrayClip, _moviepy_error
+    try:  # numpy may not be present until requirements are installed
+        import numpy as np
+    except Exception:  # noqa: BLE001
+        pass
+    try:  # moviepy may not be present until requirements are installed
+        # Try moviepy 2.x imports first (top level)
+        try:
+            from moviepy import AudioFileClip, ImageClip, concatenate_videoclips, AudioClip, concatenate_audioclips
+        except ImportError:
+            # Fallback to moviepy 1.x imports
+            from moviepy.editor import AudioFileClip, ImageClip, concatenate_videoclips, AudioClip, concatenate_audioclips
+    except Exception as exc:  # noqa: BLE001
+        AudioFileClip = ImageClip = concatenate_videoclips = AudioClip = concatenate_audioclips = None
+        _moviepy_error = exc
+        return False
+    try:  # AudioArrayClip lives at the same path in moviepy 1.x and 2.x
+        from moviepy.audio.AudioClip import AudioArrayClip
+    except Exception:  # noqa: BLE001
+        pass
+    return True
+
+_HTML_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def _precompute_frames(storyboard: Sequence[Dict[str, str]], topic: str, audio_dir: Path) -> Dict[str, List[Any]]:
+    """一次性把分镜整理成按帧对齐的并行列表：旁白文字、估算时长、mp3/wav 路径"""
+    texts = [_HTML_TAG_RE.sub("", frame.get("narration") or frame.get("body") or "") for frame in storyboard]
+    return {
+        "texts": texts,
+        # 估算时长 (与 orchestrator.py 逻辑保持一致)
+        "durations": [max(3.0, len(text) * 0.3 + 1.0) for text in texts],
+        "mp3": [audio_dir / f"{topic}_{idx}.mp3" for idx in range(len(texts))],
+        "wav": [audio_dir / f"{topic}_{idx}.wav" for idx in range(len(texts))],
+    }
+
+
+def _nonempty_file(path: Path) -> bool:
+    """文件存在且非空（一次 stat）"""
     try:
-        from moviepy import AudioFileClip, ImageClip, concatenate_videoclips, AudioClip, concatenate_audioclips
-    except ImportError:
-        # Fallback to moviepy 1.x imports
-        from moviepy.editor import AudioFileClip, ImageClip, concatenate_videoclips, AudioClip, concatenate_audioclips
-except Exception as exc:  # noqa: BLE001
-    AudioFileClip = None  # type: ignore[assignment]
-    ImageClip = None  # type: ignore[assignment]
-    concatenate_videoclips = None  # type: ignore[assignment]
-    AudioClip = None
-    concatenate_audioclips = None
-    _moviepy_error: Optional[Exception] = exc
-else:
-    _moviepy_error = None
+        return path.stat().st_size > 0
+    except OSError:
+        return False
 
-try:  # pyttsx3 is optional for audio narration
-    import pyttsx3
-except Exception as exc:  # noqa: BLE001
-    pyttsx3 = None  # type: ignore[assignment]
-    _tts_error: Optional[Exception] = exc
-else:
-    _tts_error = None
-
-try:  # edge-tts for better TTS quality
-    import edge_tts
-    import asyncio
-except Exception as exc:  # noqa: BLE001
-    edge_tts = None  # type: ignore[assignment]
-    _edge_tts_error: Optional[Exception] = exc
-else:
-    _edge_tts_error = None
+
+_AUDIO_LOAD_WORKERS = 8
+
+
+def _load_audio_segment(segment: Union[Path, float]):
+    """加载一段音频：Path 为音频文件，float 为静音秒数；失败返回None"""
+    try:
+        if isinstance(segment, Path):
+            return AudioFileClip(str(segment))
+        if np is not None:
+            # 创建静音片段 (stereo)
+            return _make_silence(segment)
+        print(f"[WARN] Cannot create silence clip (missing numpy), sync may break")
+    except Exception as e:
+        print(f"[WARN] Failed to load audio segment {segment}: {e}")
+    return None
+
+
+_silence_buffer = None  # 共享的全零采样缓冲，按需增长，各静音片段取其切片视图
+_silence_lock = threading.Lock()  # 片段在线程池里并发加载，增长缓冲和取切片必须原子完成
+
+
+def _make_silence(duration: float, fps: int = 44100):
+    """生成指定时长的立体声静音片段（一次性数组，避免逐采样调用 Python 回调）"""
+    if AudioArrayClip is None:
+        return AudioClip(lambda t: np.zeros((1, 2)), duration=duration, fps=fps)
+    global _silence_buffer
+    samples = max(1, int(duration * fps))
+    with _silence_lock:
+        if _silence_buffer is None or len(_silence_buffer) < samples:
+            _silence_buffer = np.zeros((samples, 2), dtype=np.float32)
+        buffer = _silence_buffer[:samples]
+    return AudioArrayClip(buffer, fps=fps)
+
+@lru_cache(maxsize=1)
+def _get_pyttsx3():
+    """按需导入 pyttsx3（可选的离线语音引擎），避免每次启动都加载语音驱动"""
+    try:
+        import pyttsx3
+    except Exception:  # noqa: BLE001
+        return None
+    return pyttsx3
+
+edge_tts = None  # type: ignore[assignment]
+
+
+@lru_cache(maxsize=1)
+def _load_edge_tts():
+    """按需导入 edge-tts（for better TTS quality），失败时返回 None"""
+    global edge_tts
+    try:
+        import edge_tts
+    except Exception:  # noqa: BLE001
+        return None
+    return edge_tts
 
 # Removed gTTS as requested
 
-import sys
-import httpx
-import json
-import ssl
+_PYTTSX3_RATE = 180
+_PYTTSX3_VOLUME = 0.85
+
+
+def _apply_pyttsx3_properties(engine: Any, voice_id: Optional[str], rate: int, volume: float) -> None:
+    if voice_id:
+        engine.setProperty("voice", voice_id)
+    engine.setProperty("rate", rate)
+    engine.setProperty("volume", volume)
+
+
+def _pick_pyttsx3_voice(engine: Any) -> Optional[str]:
+    """优先选择中文语音，没有则用第一个可用语音"""
+    try:
+        voices = engine.getProperty("voices")
+    except Exception:  # noqa: BLE001
+        return None
+    preferred = ["zh", "cn", "chinese"]
+    for voice in voices:
+        voice_id = getattr(voice, "id", "") or ""
+        voice_name = getattr(voice, "name", "") or ""
+        label = f"{voice_id} {voice_name}".lower()
+        if any(token in label for token in preferred):
+            return voice_id
+    return voices[0].id if voices else None
+
+
+def _synth_one(text: str, voice_id: Optional[str], rate: int, volume: float, out_path: str) -> bool:
+    """在独立进程中用一个全新的 pyttsx3 引擎合成单段离线语音（供进程池调用，必须位于模块级）"""
+    pyttsx3 = _get_pyttsx3()
+    if pyttsx3 is None:
+        return False
+    engine = pyttsx3.init()
+    try:
+        _apply_pyttsx3_properties(engine, voice_id or _pick_pyttsx3_voice(engine), rate, volume)
+        engine.save_to_file(text, out_path)
+        engine.runAndWait()
+    finally:
+        engine.stop()
+    return Path(out_path).exists()
+
+
+try:  # h2 enables HTTP/2 multiplexing in httpx
+    import h2  # noqa: F401
+except Exception:  # noqa: BLE001
+    _http2_available = False
+else:
+    _http2_available = True
+
+try:  # aiofiles keeps TTS downloads from blocking the event loop on disk writes
+    import aiofiles
+except Exception:  # noqa: BLE001
+    aiofiles = None  # type: ignore[assignment]
+
+try:  # uvloop (libuv) speeds up the background TTS event loop; not available on Windows
+    if sys.platform == "win32":
+        raise ImportError("uvloop does not support Windows")
+    import uvloop
+except Exception:  # noqa: BLE001
+    uvloop = None  # type: ignore[assignment]
+
 try:
-    from .utils import ensure_dir, slugify
+    from .utils import ensure_dir, find_ffmpeg, find_ffprobe, slugify, user_cache_dir
 except ImportError:
     PARENT_DIR = Path(__file__).resolve().parent
     if str(PARENT_DIR) not in sys.path:
         sys.path.append(str(PARENT_DIR))
-    from utils import ensure_dir, slugify
+    from utils import ensure_dir, find_ffmpeg, find_ffprobe, slugify, user_cache_dir
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """每次输出时取当前的 sys.stdout（GUI 启动后会把 stdout 重定向到日志文件）"""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
 
+
+def _setup_logging() -> logging.Logger:
+    """TTS 日志经队列交给后台线程输出，并发请求时不在事件循环里争抢 stdout 锁"""
+    logger = logging.getLogger("phoenix.media")
+    if not logger.handlers:
+        records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        logger.addHandler(QueueHandler(records))
+        listener = QueueListener(records, _StdoutHandler())
+        listener.start()
+        atexit.register(listener.stop)
+        logger.setLevel(logging.WARNING if os.environ.get("PHOENIX_QUIET") else logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+log = _setup_logging()
+
+@lru_cache(maxsize=1)
 def create_permissive_ssl_context():
-    """创建宽松的SSL上下文，解决某些服务器握手失败的问题"""
+    """创建宽松的SSL上下文，解决某些服务器握手失败的问题（进程内只构建一次，所有客户端共享）"""
     try:
         ctx = ssl.create_default_context()
         ctx.check_hostname = False
@@ -81,19 +262,146 @@ def create_permissive_ssl_context():
     except Exception:
         return False  # Fallback to verify=False
 
+
+# 每个事件循环复用一组 httpx 客户端（连接池 + HTTP/2），避免每次 TTS 请求都重新建连握手
+# httpx 的连接绑定在创建它的事件循环上，所以按循环分别缓存；循环被回收后自动释放
+_TTS_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[bool, httpx.AsyncClient]]" = weakref.WeakKeyDictionary()
+
+
+async def _get_client(permissive_ssl: bool = False) -> httpx.AsyncClient:
+    """获取当前事件循环共享的 TTS HTTP 客户端"""
+    clients = _TTS_CLIENTS.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(permissive_ssl)
+    if client is None or client.is_closed:
+        import httpx  # 推迟到第一次发起 TTS 请求时再导入
+
+        client = httpx.AsyncClient(
+            verify=create_permissive_ssl_context() if permissive_ssl else True,
+            http2=_http2_available,
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        )
+        clients[permissive_ssl] = client
+    return client
+
+
+async def close_tts_clients() -> None:
+    """关闭当前事件循环上的共享 TTS 客户端（事件循环结束前调用）"""
+    clients = _TTS_CLIENTS.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.aclose()
+
+_STREAM_CHUNK_SIZE = 64 * 1024
+
+
+async def _write_audio_bytes(output_path: Path, chunks) -> None:
+    """把异步字节流逐块写入文件（有 aiofiles 时不阻塞事件循环）
+
+    先写入同目录的 .part 临时文件，流完整结束后再原子替换；连接中断时删除残缺文件，
+    避免留下非空但被截断的音频被后续当作有效文件跳过重新生成。
+    """
+    part_path = output_path.with_name(output_path.name + ".part")
+    try:
+        if aiofiles is not None:
+            async with aiofiles.open(part_path, "wb") as f:
+                async for chunk in chunks:
+                    await f.write(chunk)
+        else:
+            with open(part_path, "wb") as f:
+                async for chunk in chunks:
+                    f.write(chunk)
+        os.replace(part_path, output_path)
+    except BaseException:
+        part_path.unlink(missing_ok=True)
+        raise
+
+
+async def _single_chunk(data: bytes):
+    yield data
+
+
+_BASE64_CHUNK_CHARS = 4 * 16 * 1024  # 必须是4的倍数，每块解码约48KB
+
+
+async def _iter_base64_chunks(data: str):
+    """分块解码 Base64 字符串，避免一次性生成整段音频的 bytes"""
+    if "\n" in data or "\r" in data:
+        data = "".join(data.split())
+    for start in range(0, len(data), _BASE64_CHUNK_CHARS):
+        yield binascii.a2b_base64(data[start:start + _BASE64_CHUNK_CHARS])
+
+
+async def _stream_to_file(client: httpx.AsyncClient, method: str, url: str, output_path: Path, buffer: bool = False, **kwargs) -> Tuple[httpx.Response, bool]:
+    """流式请求音频：200 且非 JSON 的响应体边下载边写入 output_path
+
+    其余情况（错误码、JSON 包装的响应或 buffer=True）读入内存，供调用方照常检查 response.text/json()
+
+    Returns:
+        (response, 是否已写入文件)
+    """
+    async with client.stream(method, url, **kwargs) as response:
+        content_type = response.headers.get("content-type", "")
+        if response.status_code == 200 and not buffer and "application/json" not in content_type:
+            await _write_audio_bytes(output_path, response.aiter_bytes(_STREAM_CHUNK_SIZE))
+            return response, True
+        await response.aread()
+    return response, False
+
+
+# 各服务商的最终请求URL只取决于配置的 base_url（和模型），解析一次后缓存
+_DASHSCOPE_API_ROOT = "https://dashscope.aliyuncs.com/api/v1"
+_DASHSCOPE_MULTIMODAL_PATH = "/services/aigc/multimodal-generation/generation"
+_ALIYUN_OPENAI_COMPATIBLE_URL = "https://dashscope.aliyuncs.com/compatible-mode/v1/audio/speech"
+
+
+@lru_cache(maxsize=32)
+def _xiaoai_endpoint(base_url: str) -> str:
+    """OpenAI 兼容接口：补全 /audio/speech"""
+    base_url = base_url.rstrip('/')
+    if base_url.endswith("/audio/speech"):
+        return base_url
+    return f"{base_url}/audio/speech"
+
+
+@lru_cache(maxsize=32)
+def _aliyun_endpoint(base_url: Optional[str], model: str) -> str:
+    if model == "qwen3-tts-flash":
+        # Standard DashScope API
+        # User reported correct URL: https://dashscope.aliyuncs.com/api/v1/services/aigc/multimodal-generation/generation
+        if not base_url:
+            return f"{_DASHSCOPE_API_ROOT}{_DASHSCOPE_MULTIMODAL_PATH}"
+        # If user provided a base url, we assume it's the root API path (e.g. .../api/v1)
+        # We append the service path if not present
+        if "services/" not in base_url:
+            return f"{base_url.rstrip('/')}{_DASHSCOPE_MULTIMODAL_PATH}"
+        return base_url
+    # OpenAI Compatible
+    if not base_url:
+        return _ALIYUN_OPENAI_COMPATIBLE_URL
+    if "audio/speech" not in base_url:
+        return f"{base_url.rstrip('/')}/audio/speech"
+    return base_url
+
+
+@lru_cache(maxsize=32)
+def _qwen_endpoint(base_url: str) -> str:
+    # 官方推荐 endpoint: https://dashscope.aliyuncs.com/api/v1/services/aigc/multimodal-generation/generation
+    # 强制使用 dashscope.aliyuncs.com 的正确基础 URL
+    # 如果用户错误配置了 base_url (例如指向 compatible-mode)，我们在这里进行修正
+    if "dashscope.aliyuncs.com" in base_url:
+        base_url = _DASHSCOPE_API_ROOT
+    base_url = base_url.rstrip('/')
+    if "services/" not in base_url:
+        return f"{base_url}{_DASHSCOPE_MULTIMODAL_PATH}"
+    return base_url
+
+
 async def generate_tts_audio_async(text: str, output_path: Path, voice: str = "zh-CN-XiaoxiaoNeural") -> bool:
     """使用Edge TTS异步生成高质量中文语音"""
-    if edge_tts is None:
+    if _load_edge_tts() is None:
         return False
     
     try:
-        text = text.strip()
-        if not text:
-            return False
-        text = text.replace('\x00', '')
-        if len(text) > 3000:
-            text = text[:3000]
-        
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
         # 使用用户指定的语音
@@ -108,28 +416,22 @@ async def generate_tts_audio_async(text: str, output_path: Path, voice: str = "z
         return output_path.exists() and output_path.stat().st_size > 0
             
     except Exception as e:
-        print(f"Edge TTS生成失败: {e}")
+        log.warning("Edge TTS生成失败: %s", e)
         return False
 
 
 async def generate_tts_audio_xiaoai(text: str, output_path: Path, api_key: str, base_url: str, voice: str, model: str = "tts-1", speed: float = 1.0) -> bool:
     """使用Xiaoai TTS (OpenAI兼容接口)"""
-    print(f"[TTS] Xiaoai Request: voice={voice}, model={model}, speed={speed}, base_url={base_url}")
+    log.info("[TTS] Xiaoai Request: voice=%s, model=%s, speed=%s, base_url=%s", voice, model, speed, base_url)
     if not api_key:
-        print("[TTS] Xiaoai TTS失败: 未提供API Key")
+        log.warning("[TTS] Xiaoai TTS失败: 未提供API Key")
         return False
         
     try:
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # 智能构造请求URL
-        base_url = base_url.rstrip('/')
-        if base_url.endswith("/audio/speech"):
-            url = base_url
-        else:
-            url = f"{base_url}/audio/speech"
-            
-        print(f"[TTS] Xiaoai Final URL: {url}")
+        url = _xiaoai_endpoint(base_url)
+        log.info("[TTS] Xiaoai Final URL: %s", url)
             
         headers = {
             "Authorization": f"Bearer {api_key}",
@@ -144,46 +446,41 @@ async def generate_tts_audio_xiaoai(text: str, output_path: Path, api_key: str,
             "speed": speed
         }
         
-        ssl_context = create_permissive_ssl_context()
-        async with httpx.AsyncClient(verify=ssl_context, timeout=30.0) as client:
-            response = await client.post(url, json=payload, headers=headers)
-            
-            # 如果因为参数错误失败（例如不支持speed），尝试不带speed重试
-            if response.status_code == 400 and "speed" in response.text.lower():
-                print(f"[TTS] Xiaoai 400 Error (possibly speed param), retrying without speed...")
-                payload.pop("speed", None)
-                response = await client.post(url, json=payload, headers=headers)
-            
-            if response.status_code != 200:
-                print(f"[TTS] Xiaoai TTS API错误: {response.status_code} - {response.text}")
-                return False
-            
-            with open(output_path, "wb") as f:
-                f.write(response.content)
+        client = await _get_client(permissive_ssl=True)
+        response, written = await _stream_to_file(client, "POST", url, output_path, json=payload, headers=headers)
+        
+        # 如果因为参数错误失败（例如不支持speed），尝试不带speed重试
+        if response.status_code == 400 and "speed" in response.text.lower():
+            log.warning("[TTS] Xiaoai 400 Error (possibly speed param), retrying without speed...")
+            payload.pop("speed", None)
+            response, written = await _stream_to_file(client, "POST", url, output_path, json=payload, headers=headers)
+        
+        if response.status_code != 200:
+            log.warning("[TTS] Xiaoai TTS API错误: %s - %s", response.status_code, response.text)
+            return False
+        
+        if not written:
+            await _write_audio_bytes(output_path, _single_chunk(response.content))
         
         size = output_path.stat().st_size if output_path.exists() else 0
-        print(f"[TTS] Xiaoai 生成成功: {output_path.name} ({size} bytes)")
+        log.info("[TTS] Xiaoai 生成成功: %s (%s bytes)", output_path.name, size)
         return output_path.exists() and size > 0
     except Exception as e:
-        print(f"[TTS] Xiaoai TTS生成异常: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("[TTS] Xiaoai TTS生成异常: %s", e)
         return False
 
 
 async def generate_tts_audio_aliyun(text: str, output_path: Path, api_key: str, voice: str, model: str = "cosyvoice-v1", base_url: str = None, rate: float = 1.0, volume: int = 50) -> bool:
     """使用通义千问 (Aliyun CosyVoice) TTS - OpenAI Compatible Interface"""
-    print(f"[TTS] Aliyun Request: voice={voice}, model={model}, rate={rate}, volume={volume}, base_url={base_url}")
+    log.info("[TTS] Aliyun Request: voice=%s, model=%s, rate=%s, volume=%s, base_url=%s", voice, model, rate, volume, base_url)
     if not api_key:
-        print("[TTS] Aliyun TTS失败: 未提供API Key")
+        log.warning("[TTS] Aliyun TTS失败: 未提供API Key")
         return False
         
     try:
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # Default URLs
-        openai_compatible_url = "https://dashscope.aliyuncs.com/compatible-mode/v1/audio/speech"
-        dashscope_url = "https://dashscope.aliyuncs.com/api/v1/services/audio/text-to-speech/generation"
+        url = _aliyun_endpoint(base_url, model)
         
         headers = {
             "Authorization": f"Bearer {api_key}",
@@ -200,20 +497,6 @@ async def generate_tts_audio_aliyun(text: str, output_path: Path, api_key: str,
         
         # 特殊处理 qwen3-tts-flash
         if model == "qwen3-tts-flash":
-             # Standard DashScope API
-             # User reported correct URL: https://dashscope.aliyuncs.com/api/v1/services/aigc/multimodal-generation/generation
-             target_suffix = "/services/aigc/multimodal-generation/generation"
-             
-             if base_url:
-                 # If user provided a base url, we assume it's the root API path (e.g. .../api/v1)
-                 # We append the service path if not present
-                 if "services/" not in base_url:
-                     url = f"{base_url.rstrip('/')}{target_suffix}"
-                 else:
-                     url = base_url
-             else:
-                 url = f"https://dashscope.aliyuncs.com/api/v1{target_suffix}"
-
              payload = {
                 "model": model,
                 "input": {
@@ -227,95 +510,69 @@ async def generate_tts_audio_aliyun(text: str, output_path: Path, api_key: str,
                     "speech_rate": int((rate - 1.0) * 500)
                 }
             }
-        else:
-            # OpenAI Compatible
-            if base_url:
-                 if "audio/speech" not in base_url:
-                     url = f"{base_url.rstrip('/')}/audio/speech"
-                 else:
-                     url = base_url
-            else:
-                 url = openai_compatible_url
         
-        print(f"[TTS] Aliyun URL: {url}")
+        log.info("[TTS] Aliyun URL: %s", url)
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(url, json=payload, headers=headers)
-            
-            if response.status_code != 200:
-                print(f"[TTS] Aliyun TTS API错误: {response.status_code} - {response.text}")
-                # 如果是 400 且包含 speed，尝试去掉 speed 重试 (兼容性处理)
-                if response.status_code == 400 and "speed" in response.text.lower():
-                     print(f"[TTS] Aliyun Retrying without speed param...")
-                     payload.pop("speed", None)
-                     response = await client.post(url, json=payload, headers=headers)
-                     if response.status_code != 200:
-                         print(f"[TTS] Aliyun Retry Failed: {response.status_code} - {response.text}")
-                         return False
-
-            if response.status_code == 200:
-                # Check if response is JSON (for qwen3-tts-flash)
-                content_type = response.headers.get("content-type", "")
-                if "application/json" in content_type or (model == "qwen3-tts-flash" and response.content.strip().startswith(b"{")):
-                    try:
-                        data = response.json()
-                        if "output" in data and "audio" in data["output"] and "url" in data["output"]["audio"]:
-                            audio_url = data["output"]["audio"]["url"]
-                            print(f"[TTS] Aliyun downloading audio from: {audio_url}")
-                            # Download the audio
-                            audio_response = await client.get(audio_url)
-                            if audio_response.status_code == 200:
-                                with open(output_path, "wb") as f:
-                                    f.write(audio_response.content)
-                            else:
-                                print(f"[TTS] Failed to download audio from URL: {audio_response.status_code}")
-                                return False
-                        else:
-                            # Fallback: maybe it's direct binary?
-                            print(f"[TTS] Aliyun JSON response but no audio URL found: {data}")
+        client = await _get_client(permissive_ssl=False)
+        # qwen3-tts-flash 返回 JSON（内含音频URL），不直接流式落盘
+        buffer = model == "qwen3-tts-flash"
+        response, written = await _stream_to_file(client, "POST", url, output_path, buffer=buffer, json=payload, headers=headers)
+        
+        if response.status_code != 200:
+            log.warning("[TTS] Aliyun TTS API错误: %s - %s", response.status_code, response.text)
+            # 如果是 400 且包含 speed，尝试去掉 speed 重试 (兼容性处理)
+            if response.status_code == 400 and "speed" in response.text.lower():
+                 log.warning("[TTS] Aliyun Retrying without speed param...")
+                 payload.pop("speed", None)
+                 response, written = await _stream_to_file(client, "POST", url, output_path, buffer=buffer, json=payload, headers=headers)
+                 if response.status_code != 200:
+                     log.warning("[TTS] Aliyun Retry Failed: %s - %s", response.status_code, response.text)
+                     return False
+
+        if response.status_code == 200 and not written:
+            # Check if response is JSON (for qwen3-tts-flash)
+            content_type = response.headers.get("content-type", "")
+            if "application/json" in content_type or (model == "qwen3-tts-flash" and response.content.strip().startswith(b"{")):
+                try:
+                    data = response.json()
+                    if "output" in data and "audio" in data["output"] and "url" in data["output"]["audio"]:
+                        audio_url = data["output"]["audio"]["url"]
+                        log.info("[TTS] Aliyun downloading audio from: %s", audio_url)
+                        # Download the audio
+                        audio_response, _ = await _stream_to_file(client, "GET", audio_url, output_path)
+                        if audio_response.status_code != 200:
+                            log.warning("[TTS] Failed to download audio from URL: %s", audio_response.status_code)
                             return False
-                    except Exception as e:
-                        print(f"[TTS] Error parsing Aliyun JSON response: {e}")
+                    else:
+                        # Fallback: maybe it's direct binary?
+                        log.warning("[TTS] Aliyun JSON response but no audio URL found: %s", data)
                         return False
-                else:
-                    # Direct binary response (OpenAI compatible)
-                    with open(output_path, "wb") as f:
-                        f.write(response.content)
-                
+                except Exception as e:
+                    log.warning("[TTS] Error parsing Aliyun JSON response: %s", e)
+                    return False
+            else:
+                # Direct binary response (OpenAI compatible)
+                await _write_audio_bytes(output_path, _single_chunk(response.content))
+            
         size = output_path.stat().st_size if output_path.exists() else 0
         return output_path.exists() and size > 0
     except Exception as e:
-        print(f"[TTS] Aliyun TTS生成失败: {e}")
+        log.warning("[TTS] Aliyun TTS生成失败: %s", e)
         return False
 
 
 async def generate_tts_audio_qwen(text: str, output_path: Path, api_key: str, voice: str = "Cherry", language: str = "Chinese", base_url: str = "https://dashscope.aliyuncs.com/api/v1") -> bool:
     """使用阿里云Qwen3-TTS-Flash生成语音"""
-    print(f"[TTS] Qwen Request: voice={voice}, language={language}, base_url={base_url}")
+    log.info("[TTS] Qwen Request: voice=%s, language=%s, base_url=%s", voice, language, base_url)
     if not api_key:
-        print("[TTS] Qwen TTS失败: 未提供API Key")
+        log.warning("[TTS] Qwen TTS失败: 未提供API Key")
         return False
     
     try:
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # 构造API URL
-        # 官方推荐 endpoint: https://dashscope.aliyuncs.com/api/v1/services/aigc/multimodal-generation/generation
-        target_path = "/services/aigc/multimodal-generation/generation"
-        
-        # 强制使用 dashscope.aliyuncs.com 的正确基础 URL
-        # 如果用户错误配置了 base_url (例如指向 compatible-mode)，我们在这里进行修正
-        if "dashscope.aliyuncs.com" in base_url:
-             # 重置为标准 API 根路径
-             base_url = "https://dashscope.aliyuncs.com/api/v1"
-        
-        base_url = base_url.rstrip('/')
-        if "services/" not in base_url:
-            url = f"{base_url}{target_path}"
-        else:
-            url = base_url
-            
-        print(f"[TTS] Qwen Final URL: {url}")
+        url = _qwen_endpoint(base_url)
+        log.info("[TTS] Qwen Final URL: %s", url)
         
         headers = {
             "Authorization": f"Bearer {api_key}",
@@ -339,162 +596,175 @@ async def generate_tts_audio_qwen(text: str, output_path: Path, api_key: str, vo
             }
         }
         
-        ssl_context = create_permissive_ssl_context()
-        async with httpx.AsyncClient(verify=ssl_context, timeout=30.0) as client:
-            response = await client.post(url, json=payload, headers=headers)
-            
-            if response.status_code != 200:
-                print(f"[TTS] Qwen TTS API错误: {response.status_code} - {response.text}")
-                return False
-            
-            # 解析JSON响应
-            try:
-                data = response.json()
-                if "output" in data and "audio" in data["output"]:
-                    audio_data = data["output"]["audio"]
-                    # audio_data可能是Base64编码或直接的URL
-                    if isinstance(audio_data, dict) and "url" in audio_data:
-                        # 下载URL中的音频
-                        audio_url = audio_data["url"]
-                        print(f"[TTS] Qwen downloading audio from: {audio_url}")
-                        audio_response = await client.get(audio_url, timeout=30.0)
-                        if audio_response.status_code == 200:
-                            with open(output_path, "wb") as f:
-                                f.write(audio_response.content)
-                        else:
-                            print(f"[TTS] Qwen failed to download audio: {audio_response.status_code}")
-                            return False
-                    elif isinstance(audio_data, str):
-                        # Base64编码的音频数据
-                        # 检查是否是URL
-                        if audio_data.startswith("http"):
-                             audio_url = audio_data
-                             print(f"[TTS] Qwen downloading audio from: {audio_url}")
-                             audio_response = await client.get(audio_url, timeout=30.0)
-                             if audio_response.status_code == 200:
-                                 with open(output_path, "wb") as f:
-                                     f.write(audio_response.content)
-                             else:
-                                 print(f"[TTS] Qwen failed to download audio: {audio_response.status_code}")
-                                 return False
-                        else:
-                            # Base64 decode
-                            import base64
-                            audio_bytes = base64.b64decode(audio_data)
-                            with open(output_path, "wb") as f:
-                                f.write(audio_bytes)
-                    else:
-                        print(f"[TTS] Qwen unexpected audio format: {type(audio_data)}")
+        client = await _get_client(permissive_ssl=True)
+        response = await client.post(url, json=payload, headers=headers)
+        
+        if response.status_code != 200:
+            log.warning("[TTS] Qwen TTS API错误: %s - %s", response.status_code, response.text)
+            return False
+        
+        # 解析JSON响应
+        try:
+            data = response.json()
+            if "output" in data and "audio" in data["output"]:
+                audio_data = data["output"]["audio"]
+                # audio_data可能是Base64编码或直接的URL
+                if isinstance(audio_data, dict) and "url" in audio_data:
+                    # 下载URL中的音频
+                    audio_url = audio_data["url"]
+                    log.info("[TTS] Qwen downloading audio from: %s", audio_url)
+                    audio_response, _ = await _stream_to_file(client, "GET", audio_url, output_path, timeout=30.0)
+                    if audio_response.status_code != 200:
+                        log.warning("[TTS] Qwen failed to download audio: %s", audio_response.status_code)
                         return False
+                elif isinstance(audio_data, str):
+                    # Base64编码的音频数据
+                    # 检查是否是URL
+                    if audio_data.startswith("http"):
+                         audio_url = audio_data
+                         log.info("[TTS] Qwen downloading audio from: %s", audio_url)
+                         audio_response, _ = await _stream_to_file(client, "GET", audio_url, output_path, timeout=30.0)
+                         if audio_response.status_code != 200:
+                             log.warning("[TTS] Qwen failed to download audio: %s", audio_response.status_code)
+                             return False
+                    else:
+                        # Base64 数据分块解码后直接写入文件
+                        await _write_audio_bytes(output_path, _iter_base64_chunks(audio_data))
                 else:
-                    print(f"[TTS] Qwen no audio in response: {data}")
+                    log.warning("[TTS] Qwen unexpected audio format: %s", type(audio_data))
                     return False
-            except Exception as e:
-                print(f"[TTS] Qwen failed to parse response: {e}")
+            else:
+                log.warning("[TTS] Qwen no audio in response: %s", data)
                 return False
+        except Exception as e:
+            log.warning("[TTS] Qwen failed to parse response: %s", e)
+            return False
         
         size = output_path.stat().st_size if output_path.exists() else 0
-        print(f"[TTS] Qwen生成成功: {output_path.name} ({size} bytes)")
+        log.info("[TTS] Qwen生成成功: %s (%s bytes)", output_path.name, size)
         return output_path.exists() and size > 0
     except Exception as e:
-        print(f"[TTS] Qwen TTS生成异常: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("[TTS] Qwen TTS生成异常: %s", e)
         return False
 
 
-def generate_tts_audio_pyttsx3(text: str, output_path: Path) -> bool:
-    """使用pyttsx3生成本地TTS（离线，无需网络）
-    
-    Args:
-        text: 要转换为语音的文字
-        output_path: 输出音频文件路径（.wav或.mp3格式）
-    
-    Returns:
-        bool: 成功返回True，失败返回False
-    """
-    if pyttsx3 is None:
-        return False
-    
-    try:
-        # 初始化引擎
-        engine = pyttsx3.init()
-        
-        # 设置中文语音（如果可用）
-        try:
-            voices = engine.getProperty('voices')
-            for voice in voices:
-                voice_lang = getattr(voice, 'languages', [])
-                if 'chinese' in voice.name.lower() or any('zh' in str(lang).lower() for lang in voice_lang):
-                    engine.setProperty('voice', voice.id)
-                    break
-        except:
-            pass
-        
-        # 设置语速和音量
-        try:
-            engine.setProperty('rate', 160)  # 稍快的语速
-            engine.setProperty('volume', 0.9)
-        except:
-            pass
-        
-        # 确保输出目录存在
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        # 保存到文件
-        engine.save_to_file(text, str(output_path))
-        engine.runAndWait()
-        engine.stop()
-        
-        # 检查文件是否生成成功
-        return output_path.exists() and output_path.stat().st_size > 0
-            
-    except Exception as e:
-        return False
+# 所有同步入口共用一个常驻后台事件循环：免去每次调用建线程/建循环的开销，
+# 也让该循环上的 httpx 连接池在多次调用之间保持复用
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_LOOP_LOCK = threading.Lock()
 
 
-import threading
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """返回后台事件循环，首次调用时在守护线程中启动"""
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None:
+            loop = uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="media-async-loop", daemon=True).start()
+            atexit.register(_shutdown_background_loop, loop)
+            _LOOP = loop
+    return _LOOP
+
+
+def _shutdown_background_loop(loop: asyncio.AbstractEventLoop) -> None:
+    """进程退出时关闭共享客户端并停止后台循环"""
+    try:
+        asyncio.run_coroutine_threadsafe(close_tts_clients(), loop).result(timeout=5)
+    except Exception:  # noqa: BLE001
+        pass
+    loop.call_soon_threadsafe(loop.stop)
+
 
 def run_sync(coro):
     """Helper to run async coroutine synchronously, handling nested loops"""
+    loop = _background_loop()
     try:
-        loop = asyncio.get_running_loop()
+        running = asyncio.get_running_loop()
     except RuntimeError:
-        loop = None
-        
-    if loop and loop.is_running():
-        # Run in a separate thread to avoid "loop already running" error
-        result = None
-        exception = None
-        def run():
-            nonlocal result, exception
-            new_loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(new_loop)
-            try:
-                result = new_loop.run_until_complete(coro)
-            except Exception as e:
-                exception = e
-            finally:
-                new_loop.close()
-        
-        t = threading.Thread(target=run)
-        t.start()
-        t.join()
-        if exception:
-            raise exception
-        return result
-    else:
-        # No loop running, use asyncio.run
-        return asyncio.run(coro)
+        running = None
+    if running is loop:
+        # 在后台循环内部同步等待自身会死锁
+        coro.close()
+        raise RuntimeError("run_sync cannot be called from the media background loop; await the coroutine instead")
+    # 调用方处于其他事件循环（如 GUI/webview 线程）时同样安全：只阻塞调用线程
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
 
-def generate_tts_audio(text: str, output_path: Path, tts_engine: str = "edge_tts", voice: str = "zh-CN-XiaoxiaoNeural", tts_config: Dict[str, Any] = None) -> bool:
-    """智能TTS生成：根据用户选择的引擎生成语音"""
-    text = text.strip()
-    if not text:
-        return False
-    
-    tts_config = tts_config or {}
-    
+@dataclass(slots=True, frozen=True)
+class ResolvedTTSConfig:
+    """一次解析好的 TTS 配置（默认值已填充），整批合成共用，避免每段文字重复查字典"""
+
+    voice: str
+    xiaoai_api_key: str
+    xiaoai_base_url: str
+    xiaoai_voice: str
+    xiaoai_model: str
+    xiaoai_speed: float
+    aliyun_api_key: str
+    aliyun_voice: str
+    aliyun_model: str
+    aliyun_base_url: Optional[str]
+    aliyun_rate: float
+    aliyun_volume: int
+    qwen_api_key: str
+    qwen_voice: str
+    qwen_language: str
+    qwen_api_base: str
+    custom_api_key: str
+    custom_api_base: str
+    custom_voice: str
+    custom_model: str
+    edge_voice: str
+
+    @classmethod
+    def from_dict(cls, tts_config: Optional[Dict[str, Any]], voice: str) -> "ResolvedTTSConfig":
+        cfg = tts_config or {}
+        # voice 不含 Neural 时视为 OpenAI 风格的语音名，可直接用于兼容接口
+        openai_voice = voice if voice and "Neural" not in voice else None
+        return cls(
+            voice=voice,
+            xiaoai_api_key=cfg.get("xiaoai_api_key", ""),
+            xiaoai_base_url=cfg.get("xiaoai_base_url", "https://xiaoai.plus/v1"),
+            xiaoai_voice=cfg.get("xiaoai_voice") or openai_voice or "alloy",
+            xiaoai_model=cfg.get("xiaoai_model") or "tts-1",
+            xiaoai_speed=float(cfg.get("xiaoai_speed") or 1.0),
+            aliyun_api_key=cfg.get("aliyun_api_key", ""),
+            aliyun_voice=cfg.get("aliyun_voice") or openai_voice or "longxiaochun",
+            aliyun_model=cfg.get("aliyun_model") or "cosyvoice-v1",
+            aliyun_base_url=cfg.get("aliyun_base_url"),
+            aliyun_rate=float(cfg.get("aliyun_rate") or 1.0),
+            aliyun_volume=int(cfg.get("aliyun_volume") or 50),
+            qwen_api_key=cfg.get("qwen_api_key", ""),
+            qwen_voice=cfg.get("qwen_voice") or voice or "Cherry",
+            qwen_language=cfg.get("qwen_language") or "Chinese",
+            qwen_api_base=cfg.get("qwen_api_base") or _DASHSCOPE_API_ROOT,
+            custom_api_key=cfg.get("custom_api_key", ""),
+            custom_api_base=cfg.get("custom_api_base", ""),
+            custom_voice=cfg.get("custom_voice") or voice or "alloy",
+            custom_model=cfg.get("custom_model") or "tts-1",
+            # 确保使用Edge语音名称
+            # 如果voice参数包含Neural，说明是Edge语音，直接使用
+            # 否则（例如是alloy），则使用配置中的fallback edge_voice，或者默认值
+            edge_voice=voice if voice and "Neural" in voice else (cfg.get("edge_voice") or "zh-CN-XiaoxiaoNeural"),
+        )
+
+    def cache_params(self, tts_engine: str) -> Tuple[str, str, Any, str]:
+        """缓存键中区分音色的参数：(语音, 模型, 语速, 服务地址)"""
+        if tts_engine == "xiaoai":
+            return self.xiaoai_voice, self.xiaoai_model, self.xiaoai_speed, self.xiaoai_base_url
+        if tts_engine == "aliyun":
+            return self.aliyun_voice, f"{self.aliyun_model}/{self.aliyun_volume}", self.aliyun_rate, self.aliyun_base_url or ""
+        if tts_engine == "qwen3-tts-flash":
+            return self.qwen_voice, self.qwen_language, "", self.qwen_api_base
+        if tts_engine == "custom":
+            return self.custom_voice, self.custom_model, "", self.custom_api_base
+        return self.edge_voice, "", "", ""
+
+
+async def _synthesize_with_fallback(text: str, output_path: Path, tts_engine: str, cfg: ResolvedTTSConfig) -> Optional[Tuple[Path, str]]:
+    """按引擎优先级依次尝试生成语音，返回 (实际生成的音频文件, 实际使用的引擎)（失败返回None）
+
+    text 需已经过 _normalize_tts_text 处理
+    """
     # 显示当前使用的TTS引擎
     engine_display_names = {
         "xiaoai": "Xiaoai TTS",
@@ -504,8 +774,8 @@ def generate_tts_audio(text: str, output_path: Path, tts_engine: str = "edge_tts
         "custom": "自定义OpenAI兼容TTS"
     }
     
-    print(f"[TTS使用] 优先引擎: {engine_display_names.get(tts_engine, tts_engine)}")
-    print(f"[TTS参数] 语音: {voice}")
+    log.info("[TTS使用] 优先引擎: %s", engine_display_names.get(tts_engine, tts_engine))
+    log.info("[TTS参数] 语音: %s", cfg.voice)
     
     # 优先级列表
     engines_to_try = []
@@ -523,120 +793,333 @@ def generate_tts_audio(text: str, output_path: Path, tts_engine: str = "edge_tts
         engines_to_try = ["edge_tts"]
     
     for engine in engines_to_try:
-        print(f"[TTS] Trying engine: {engine}")
+        log.info("[TTS] Trying engine: %s", engine)
         if engine == "xiaoai":
             try:
                 # 确保使用.mp3
                 mp3_path = output_path.with_suffix('.mp3')
-                api_key = tts_config.get("xiaoai_api_key", "")
-                base_url = tts_config.get("xiaoai_base_url", "https://xiaoai.plus/v1")
-                
-                # 获取配置参数
-                xiaoai_voice = tts_config.get("xiaoai_voice") or (voice if voice and "Neural" not in voice else "alloy")
-                xiaoai_model = tts_config.get("xiaoai_model") or "tts-1"
-                xiaoai_speed = float(tts_config.get("xiaoai_speed") or 1.0)
-                
-                result = run_sync(generate_tts_audio_xiaoai(text, mp3_path, api_key, base_url, xiaoai_voice, xiaoai_model, xiaoai_speed))
+                result = await generate_tts_audio_xiaoai(text, mp3_path, cfg.xiaoai_api_key, cfg.xiaoai_base_url, cfg.xiaoai_voice, cfg.xiaoai_model, cfg.xiaoai_speed)
                 if result:
-                    print(f"[TTS] Xiaoai Success")
-                    return True
+                    log.info("[TTS] Xiaoai Success")
+                    return mp3_path, engine
             except Exception as e:
-                print(f"[TTS] Xiaoai TTS尝试失败: {e}")
+                log.warning("[TTS] Xiaoai TTS尝试失败: %s", e)
                 pass
 
         elif engine == "aliyun":
             try:
                 # 确保使用.mp3
                 mp3_path = output_path.with_suffix('.mp3')
-                api_key = tts_config.get("aliyun_api_key", "")
-                
-                # 获取配置参数
-                aliyun_voice = tts_config.get("aliyun_voice") or (voice if voice and "Neural" not in voice else "longxiaochun")
-                aliyun_model = tts_config.get("aliyun_model") or "cosyvoice-v1"
-                aliyun_base_url = tts_config.get("aliyun_base_url")
-                aliyun_rate = float(tts_config.get("aliyun_rate") or 1.0)
-                aliyun_volume = int(tts_config.get("aliyun_volume") or 50)
-                
-                result = run_sync(generate_tts_audio_aliyun(text, mp3_path, api_key, aliyun_voice, aliyun_model, aliyun_base_url, aliyun_rate, aliyun_volume))
+                result = await generate_tts_audio_aliyun(text, mp3_path, cfg.aliyun_api_key, cfg.aliyun_voice, cfg.aliyun_model, cfg.aliyun_base_url, cfg.aliyun_rate, cfg.aliyun_volume)
                 if result:
-                    print(f"[TTS成功] 阿里云Cosyvoice已生成语音")
-                    return True
+                    log.info("[TTS成功] 阿里云Cosyvoice已生成语音")
+                    return mp3_path, engine
             except Exception as e:
-                print(f"[TTS] Aliyun TTS尝试失败: {e}")
+                log.warning("[TTS] Aliyun TTS尝试失败: %s", e)
                 pass
 
         elif engine == "qwen3-tts-flash":
             try:
                 # 确保使用.wav
                 wav_path = output_path.with_suffix('.wav')
-                api_key = tts_config.get("qwen_api_key", "")
-                
-                # 获取配置参数
-                qwen_voice = tts_config.get("qwen_voice") or voice or "Cherry"
-                qwen_language = tts_config.get("qwen_language") or "Chinese"
-                qwen_api_base = tts_config.get("qwen_api_base") or "https://dashscope.aliyuncs.com/api/v1"
-                
-                if not api_key:
-                    print(f"[TTS] Qwen API Key未配置，跳过")
+                if not cfg.qwen_api_key:
+                    log.warning("[TTS] Qwen API Key未配置，跳过")
                 else:
-                    result = run_sync(generate_tts_audio_qwen(text, wav_path, api_key, qwen_voice, qwen_language, qwen_api_base))
+                    result = await generate_tts_audio_qwen(text, wav_path, cfg.qwen_api_key, cfg.qwen_voice, cfg.qwen_language, cfg.qwen_api_base)
                     if result:
-                        print(f"[TTS成功] 阿里云Qwen3-TTS-Flash已生成语音 (语音: {qwen_voice}, 语言: {qwen_language})")
-                        return True
+                        log.info("[TTS成功] 阿里云Qwen3-TTS-Flash已生成语音 (语音: %s, 语言: %s)", cfg.qwen_voice, cfg.qwen_language)
+                        return wav_path, engine
             except Exception as e:
-                print(f"[TTS] Qwen3-TTS-Flash TTS尝试失败: {e}")
+                log.warning("[TTS] Qwen3-TTS-Flash TTS尝试失败: %s", e)
                 pass
 
         elif engine == "custom":
             try:
                 # 确保使用.mp3
                 mp3_path = output_path.with_suffix('.mp3')
-                api_key = tts_config.get("custom_api_key", "")
-                base_url = tts_config.get("custom_api_base", "")
-                
-                # 获取配置参数
-                custom_voice = tts_config.get("custom_voice") or voice or "alloy"
-                custom_model = tts_config.get("custom_model") or "tts-1"
-                
-                if not api_key:
-                    print(f"[TTS] Custom API Key未配置，跳过")
+                if not cfg.custom_api_key:
+                    log.warning("[TTS] Custom API Key未配置，跳过")
                 else:
                     # 复用 xiaoai (OpenAI兼容) 的实现
-                    result = run_sync(generate_tts_audio_xiaoai(text, mp3_path, api_key, base_url, custom_voice, custom_model, 1.0))
+                    result = await generate_tts_audio_xiaoai(text, mp3_path, cfg.custom_api_key, cfg.custom_api_base, cfg.custom_voice, cfg.custom_model, 1.0)
                     if result:
-                        print(f"[TTS成功] 自定义TTS已生成语音")
-                        return True
+                        log.info("[TTS成功] 自定义TTS已生成语音")
+                        return mp3_path, engine
             except Exception as e:
-                print(f"[TTS] Custom TTS尝试失败: {e}")
+                log.warning("[TTS] Custom TTS尝试失败: %s", e)
                 pass
 
-        elif engine == "edge_tts" and edge_tts is not None:
+        elif engine == "edge_tts" and _load_edge_tts() is not None:
             try:
                 mp3_path = output_path.with_suffix('.mp3')
-                # 确保使用Edge语音名称
-                # 如果voice参数包含Neural，说明是Edge语音，直接使用
-                # 否则（例如是alloy），则使用配置中的fallback edge_voice，或者默认值
-                fallback_voice = tts_config.get("edge_voice") or "zh-CN-XiaoxiaoNeural"
-                edge_voice = voice if "Neural" in voice else fallback_voice
-                
-                print(f"[TTS] Fallback to Edge TTS with voice: {edge_voice}")
-                
-                result = run_sync(generate_tts_audio_async(text, mp3_path, edge_voice))
+                log.info("[TTS] Fallback to Edge TTS with voice: %s", cfg.edge_voice)
+                result = await generate_tts_audio_async(text, mp3_path, cfg.edge_voice)
                 if result:
-                    return True
+                    return mp3_path, engine
             except Exception as e:
                 pass
-        
-        elif engine == "pyttsx3" and pyttsx3 is not None:
-            try:
-                wav_path = output_path.with_suffix('.wav')
-                result = generate_tts_audio_pyttsx3(text, wav_path)
-                if result:
-                    return True
-            except Exception as e:
-                print(f"pyttsx3生成失败: {e}")
     
-    return False
+    return None
+
+
+# 内容寻址的TTS缓存：相同 文字+引擎+语音+模型+语速 只合成一次，之后直接硬链接/复制
+_TTS_CACHE_DIR = user_cache_dir("tts_cache")  # 放在用户缓存目录：打包后的资源目录可能只读，也不应被打进安装包
+_TTS_CACHE_BUDGET = 512 * 1024 * 1024  # 超出后按最近使用时间淘汰
+_TTS_CACHE_SUFFIXES = (".mp3", ".wav")
+_tts_cache_pruned = False
+_TTS_CHUNK_CHARS = 800  # 长文本按句切分后每段的最大字数，各段并发合成再无损拼接
+_SENTENCE_END_RE = re.compile(r"(?<=[。！？；!?;.\n])")
+_TTS_CHUNK_CONCURRENCY = 4  # 同一事件循环内所有分段合成共享的并发上限，避免长文本一次性打满接口
+_CHUNK_SEMAPHORES: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _tts_cache_key(text: str, tts_engine: str, cfg: ResolvedTTSConfig) -> str:
+    voice, model, rate, endpoint = cfg.cache_params(tts_engine)
+    digest = hashlib.sha256(f"{tts_engine}|{voice}|{model}|{rate}|{endpoint}|".encode("utf-8"))
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _fast_copy(source: Path, target: Path) -> None:
+    """把缓存音频放到目标位置：优先硬链接（零拷贝），否则走内核拷贝"""
+    try:
+        if os.path.samefile(source, target):
+            return  # 目标已是同一文件（上次命中留下的硬链接）
+    except OSError:
+        pass
+    target.unlink(missing_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:  # 跨设备或文件系统不支持硬链接
+        # copyfile 在 Linux 上走 sendfile、macOS 上走 fcopyfile，数据不经过用户态
+        shutil.copyfile(source, target)
+
+
+def _prune_tts_cache() -> None:
+    """首次写入缓存时检查一次容量，超出预算则淘汰最久未使用的文件"""
+    global _tts_cache_pruned
+    if _tts_cache_pruned:
+        return
+    _tts_cache_pruned = True
+    try:
+        entries = [(entry.stat(), entry) for entry in _TTS_CACHE_DIR.iterdir() if entry.suffix in _TTS_CACHE_SUFFIXES]
+    except OSError:
+        return
+    total = sum(stat.st_size for stat, _ in entries)
+    for stat, entry in sorted(entries, key=lambda item: item[0].st_mtime):
+        if total <= _TTS_CACHE_BUDGET:
+            break
+        entry.unlink(missing_ok=True)
+        total -= stat.st_size
+
+
+def _tts_cache_lookup(key: str) -> Optional[Path]:
+    for suffix in _TTS_CACHE_SUFFIXES:
+        cached = _TTS_CACHE_DIR / f"{key}{suffix}"
+        if cached.exists() and cached.stat().st_size > 0:
+            os.utime(cached)  # 刷新使用时间，供LRU淘汰参考
+            return cached
+    return None
+
+
+def _tts_cache_store(key: str, path: Path) -> None:
+    """把刚合成的音频复制（能硬链接则硬链接）进缓存，原文件保持不动
+
+    缓存目录与输出目录可能不在同一磁盘，不能直接 os.replace 移动；先写入缓存目录内的临时名再原子改名
+    """
+    _prune_tts_cache()
+    cached = ensure_dir(_TTS_CACHE_DIR) / f"{key}{path.suffix}"
+    staging = cached.with_name(f"{cached.name}.{os.getpid()}.tmp")
+    try:
+        try:
+            os.link(path, staging)
+        except OSError:  # 跨设备或文件系统不支持硬链接
+            shutil.copyfile(path, staging)
+        os.replace(staging, cached)
+    finally:
+        staging.unlink(missing_ok=True)
+
+
+def _normalize_tts_text(text: str) -> Optional[str]:
+    """清洗一次待合成文字（去除空字符和首尾空白），空文本返回None"""
+    text = text.replace('\x00', '').strip()
+    return text or None
+
+
+def _split_sentences(text: str, max_chars: int = _TTS_CHUNK_CHARS) -> List[str]:
+    """在句末标点处切分文本，并把相邻句子合并成不超过 max_chars 的段"""
+    chunks: List[str] = []
+    buffer = ""
+    for sentence in _SENTENCE_END_RE.split(text):
+        # 超长的单句只能硬切
+        while len(sentence) > max_chars:
+            if buffer:
+                chunks.append(buffer)
+                buffer = ""
+            chunks.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if len(buffer) + len(sentence) > max_chars:
+            chunks.append(buffer)
+            buffer = ""
+        buffer += sentence
+    if buffer.strip():
+        chunks.append(buffer)
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+def _concat_escape(path: Path) -> str:
+    """转义 ffmpeg concat 列表文件中单引号包裹的路径"""
+    return path.as_posix().replace("'", "'\\''")
+
+
+async def _concat_audio_files(parts: List[Path], target: Path) -> bool:
+    """用 ffmpeg concat demuxer 无损拼接同格式音频（-c copy，不重新编码）"""
+    ffmpeg = find_ffmpeg()
+    if ffmpeg is None:
+        if target.suffix == ".mp3":
+            # MP3 由独立帧组成，没有 ffmpeg 时直接按字节顺序拼接也能正常播放
+            await _write_audio_bytes(target, _iter_file_bytes(parts))
+            return True
+        return False
+    list_file = target.with_name(f"{target.stem}_concat.txt")
+    list_file.write_text("".join(f"file '{_concat_escape(part)}'\n" for part in parts), encoding="utf-8")
+    ok = False
+    try:
+        process = await asyncio.create_subprocess_exec(
+            ffmpeg, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+            "-i", str(list_file), "-c", "copy", str(target),
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE,
+        )
+        _, stderr = await process.communicate()
+        ok = process.returncode == 0
+        if not ok:
+            log.warning("[TTS] 音频拼接失败: %s", stderr.decode(errors="ignore")[:300])
+    except OSError as exc:
+        log.warning("[TTS] 无法启动 ffmpeg 拼接音频: %s", exc)
+    finally:
+        list_file.unlink(missing_ok=True)
+        if not ok:
+            target.unlink(missing_ok=True)
+    return ok
+
+
+def _chunk_semaphore() -> asyncio.Semaphore:
+    """当前事件循环共享的分段合成信号量（Semaphore 绑定事件循环，因此按循环分别创建）"""
+    loop = asyncio.get_running_loop()
+    semaphore = _CHUNK_SEMAPHORES.get(loop)
+    if semaphore is None:
+        semaphore = _CHUNK_SEMAPHORES[loop] = asyncio.Semaphore(_TTS_CHUNK_CONCURRENCY)
+    return semaphore
+
+
+async def _synthesize_chunk(chunk: str, output_path: Path, tts_engine: str, cfg: ResolvedTTSConfig) -> Optional[Tuple[Path, str]]:
+    async with _chunk_semaphore():
+        return await _synthesize_with_fallback(chunk, output_path, tts_engine, cfg)
+
+
+async def _iter_file_bytes(paths: Iterable[Path]):
+    for path in paths:
+        yield path.read_bytes()
+
+
+async def _synthesize_chunked(text: str, output_path: Path, tts_engine: str, cfg: ResolvedTTSConfig) -> Optional[Tuple[Path, Optional[str]]]:
+    """长文本：按句切分、并发合成各段，再拼接为一个音频文件
+
+    返回 (音频文件, 实际使用的引擎)；各段回退到了不同引擎时引擎为 None
+    """
+    chunks = _split_sentences(text)
+    if len(chunks) == 1:
+        return await _synthesize_with_fallback(text, output_path, tts_engine, cfg)
+    log.info("[TTS] 长文本(%s字)切分为 %s 段并发合成", len(text), len(chunks))
+    tmp = Path(tempfile.mkdtemp(prefix="tts_chunks_", dir=output_path.parent))
+    try:
+        results = await asyncio.gather(*(
+            _synthesize_chunk(chunk, tmp / f"part_{idx}", tts_engine, cfg)
+            for idx, chunk in enumerate(chunks)
+        ))
+        if any(result is None for result in results):
+            log.warning("[TTS] 部分分段合成失败")
+            return None
+        parts = [part for part, _ in results]
+        engines = {engine for _, engine in results}
+        suffixes = {part.suffix for part in parts}
+        if len(suffixes) == 1:
+            target = output_path.with_suffix(parts[0].suffix)
+            target.unlink(missing_ok=True)
+            if await _concat_audio_files(parts, target):
+                return target, engines.pop() if len(engines) == 1 else None
+        else:
+            # 各段回退到了不同引擎（mp3/wav 混合），无法无损拼接
+            log.warning("[TTS] 分段音频格式不一致: %s", suffixes)
+    finally:
+        # 分段文件（含未完成的 .part）无论成败都立即清理
+        shutil.rmtree(tmp, ignore_errors=True)
+    log.info("[TTS] 分段拼接不可用，改为整段合成")
+    return await _synthesize_with_fallback(text, output_path, tts_engine, cfg)
+
+
+async def _generate_tts_audio_cached(text: str, output_path: Path, tts_engine: str, cfg: ResolvedTTSConfig, force: bool = False) -> bool:
+    """带磁盘缓存的合成；force=True 时跳过缓存查找强制重新合成（结果仍写入缓存）"""
+    text = _normalize_tts_text(text)
+    if text is None:
+        return False
+    # 输出路径可能是上次命中/写入缓存时留下的硬链接：先断开，否则各引擎原地截断重写会连带改掉缓存里的旧条目；
+    # 同时清掉另一种格式的旧文件，免得旧的 .wav 盖过这次生成的 .mp3
+    for suffix in _TTS_CACHE_SUFFIXES:
+        output_path.with_suffix(suffix).unlink(missing_ok=True)
+    if not force:
+        try:
+            cached = _tts_cache_lookup(_tts_cache_key(text, tts_engine, cfg))
+            if cached is not None:
+                _fast_copy(cached, output_path.with_suffix(cached.suffix))
+                log.info("[TTS缓存] 命中: %s", cached.name)
+                return True
+        except OSError as e:
+            log.warning("[TTS缓存] 读取失败: %s", e)
+
+    if len(text) > _TTS_CHUNK_CHARS:
+        result = await _synthesize_chunked(text, output_path, tts_engine, cfg)
+    else:
+        result = await _synthesize_with_fallback(text, output_path, tts_engine, cfg)
+    if result is None:
+        return False
+    produced, used_engine = result
+    # 按实际产出音频的引擎记缓存：回退到 Edge 的结果不能记在原服务商名下，否则服务恢复后仍会命中错误音色
+    if used_engine is not None:
+        try:
+            _tts_cache_store(_tts_cache_key(text, used_engine, cfg), produced)
+        except Exception as e:  # noqa: BLE001 - 缓存写入失败不影响本次合成结果
+            log.warning("[TTS缓存] 写入失败: %s", e)
+    return True
+
+
+def generate_tts_audio(text: str, output_path: Path, tts_engine: str = "edge_tts", voice: str = "zh-CN-XiaoxiaoNeural", tts_config: Dict[str, Any] = None, force: bool = False) -> bool:
+    """智能TTS生成：根据用户选择的引擎生成语音（带磁盘缓存，force=True 时不读缓存）"""
+    cfg = ResolvedTTSConfig.from_dict(tts_config, voice)
+    return run_sync(_generate_tts_audio_cached(text, output_path, tts_engine, cfg, force))
+
+
+async def generate_tts_batch_async(items: Sequence[Tuple[str, Path]], tts_engine: str = "edge_tts", voice: str = "zh-CN-XiaoxiaoNeural", tts_config: Dict[str, Any] = None, concurrency: int = 8, force: bool = False) -> List[bool]:
+    """在同一事件循环内并发生成多段语音（如整个分镜的旁白）
+
+    Args:
+        items: (文字, 输出路径) 列表
+        concurrency: 同时进行的请求上限，避免触发服务商限流
+        force: 跳过 TTS 缓存查找，强制重新合成（新结果仍会写入缓存）
+
+    Returns:
+        List[bool]: 与 items 一一对应的生成结果
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    cfg = ResolvedTTSConfig.from_dict(tts_config, voice)  # 整批只解析一次配置
+
+    async def _one(text: str, output_path: Path) -> bool:
+        async with semaphore:
+            return await _generate_tts_audio_cached(text, output_path, tts_engine, cfg, force)
+
+    results = await asyncio.gather(*(_one(text, path) for text, path in items), return_exceptions=True)
+    return [result is True for result in results]
+
 
 if TYPE_CHECKING:  # pragma: no cover - used for static analysis only
     MoviepyImageClip = Any
@@ -650,6 +1133,29 @@ _RESOLUTION_MAP = {
 }
 
 
+def _slideshow_x264_params(fps: int) -> List[str]:
+    """幻灯片是长时间静止的画面，运动估计和 B 帧几乎没有收益：stillimage 调优、无 B 帧、稀疏关键帧"""
+    gop = fps * 10
+    return ["-tune", "stillimage", "-bf", "0", "-g", str(gop), "-x264-params", f"keyint={gop}:min-keyint={gop}"]
+
+
+@lru_cache(maxsize=16)
+def _load_slide_font(size: int, bold: bool = False) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
+    """按字号加载幻灯片字体；每页都会用到相同的标题/正文字号，缓存后只解析一次字体文件"""
+    candidates = [
+        "msyhbd.ttc" if bold else "msyh.ttc",
+        "Microsoft YaHei UI Bold.ttf" if bold else "Microsoft YaHei UI.ttf",
+        "segoeuib.ttf" if bold else "segoeui.ttf",
+        "arialbd.ttf" if bold else "arial.ttf",
+    ]
+    for name in candidates:
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
 @dataclass
 class VideoSettings:
     resolution: str = "1080p"
@@ -675,6 +1181,14 @@ class VideoSettings:
     watermark_opacity: float = 0.8
     watermark_size: float = 0.15
 
+    # 视频编码器：None 为 libx264（CPU），"auto" 自动探测硬件编码器，也可直接指定如 "h264_nvenc"
+    hw_encoder: Optional[str] = None
+    # 编码线程数：None 时按 CPU 核数自动选择（保留一个核给界面和其他进程）
+    encode_threads: Optional[int] = None
+
+    def threads(self) -> int:
+        return self.encode_threads or max(2, (os.cpu_count() or 2) - 1)
+
     def size(self) -> tuple[int, int]:
         if self.width is not None and self.height is not None:
             return (self.width, self.height)
@@ -685,7 +1199,33 @@ class VideoSettings:
 class MediaComposer:
     """Render storyboard-driven videos with optional narration."""
 
+    def __init__(self) -> None:
+        # 同一尺寸的渐变底图在整次导出中都相同，只生成一次，每页幻灯片拷贝一份再绘制
+        self._bg_cache: Dict[Tuple[int, int], Image.Image] = {}
+        # pyttsx3 驱动初始化较慢（SAPI 反复 init 还会泄漏 COM 状态），整个实例共用一个引擎；引擎非线程安全，用锁串行化
+        self._tts_engine: Any = None
+        self._tts_lock = threading.Lock()
+
+    def __del__(self) -> None:
+        engine = getattr(self, "_tts_engine", None)
+        if engine is not None:
+            try:
+                engine.stop()
+            except Exception:  # noqa: BLE001
+                pass
+
+    def _engine(self) -> Any:
+        """懒加载并复用 pyttsx3 引擎；调用方需持有 self._tts_lock"""
+        if self._tts_engine is None:
+            pyttsx3 = _get_pyttsx3()
+            if pyttsx3 is None:
+                return None
+            self._tts_engine = pyttsx3.init()
+        return self._tts_engine
+
     def ensure_ready(self) -> None:
+        _load_moviepy()
+        _load_pil()
         if ImageClip is None or concatenate_videoclips is None:
             raise RuntimeError(
                 "moviepy 未安装或未正确初始化，请先执行 pip install moviepy pillow pyttsx3"
@@ -726,81 +1266,27 @@ class MediaComposer:
             # 查找对应的音频文件
             audio_dir = resources_dir / "offline" / "audio"
             
-            # 准备音频片段列表
-            audio_clips = []
-            
-            # 检查 moviepy 组件
-            if not AudioClip or not concatenate_audioclips:
-                print("[ERROR] moviepy not properly loaded, audio export may fail")
+            # 每帧的文字、估算时长和音频路径一次算好，静音补全和无音频总时长共用
+            frames = _precompute_frames(storyboard, topic, audio_dir)
+            estimates = frames["durations"]
             
-            for idx, frame in enumerate(storyboard):
-                audio_mp3 = audio_dir / f"{topic}_{idx}.mp3"
-                audio_wav = audio_dir / f"{topic}_{idx}.wav"
-                
-                current_clip = None
-                
-                # 尝试加载存在的音频文件
-                if audio_wav.exists() and audio_wav.stat().st_size > 0:
-                    try:
-                        current_clip = AudioFileClip(str(audio_wav))
-                    except Exception as e:
-                        print(f"[WARN] Failed to load wav (frame {idx}): {e}")
-                        
-                if not current_clip and audio_mp3.exists() and audio_mp3.stat().st_size > 0:
-                    try:
-                        current_clip = AudioFileClip(str(audio_mp3))
-                    except Exception as e:
-                        print(f"[WARN] Failed to load mp3 (frame {idx}): {e}")
-                
-                if current_clip:
-                    audio_clips.append(current_clip)
-                    print(f"[音频] 帧 {idx+1}: {current_clip.duration:.2f}s (文件)")
+            # 按帧收集音频：已存在的音频文件，或按旁白字数估算的静音时长
+            segments: List[Union[Path, float]] = []
+            for idx, (audio_mp3, audio_wav, duration) in enumerate(zip(frames["mp3"], frames["wav"], estimates)):
+                if _nonempty_file(audio_wav):
+                    segments.append(audio_wav)
+                    print(f"[音频] 帧 {idx+1}: {audio_wav.name} (文件)")
+                elif _nonempty_file(audio_mp3):
+                    segments.append(audio_mp3)
+                    print(f"[音频] 帧 {idx+1}: {audio_mp3.name} (文件)")
                 else:
                     # 无音频，生成静音片段以保持时间轴同步
-                    # 计算估算时长 (与 orchestrator.py 逻辑保持一致)
-                    text = frame.get("narration") or frame.get("body") or ""
-                    # 清除HTML标签
-                    if text:
-                        import re
-                        text = re.sub(r'<[^>]+>', '', text)
-                    
-                    # 估算时长算法
-                    char_count = len(text)
-                    duration = max(3.0, char_count * 0.3 + 1.0)
-                    
-                    # 创建静音片段
-                    if AudioClip and np is not None:
-                        try:
-                            # 创建静音片段 (stereo)
-                            silence = AudioClip(lambda t: np.zeros((1, 2)), duration=duration, fps=44100)
-                            audio_clips.append(silence)
-                            print(f"[音频] 帧 {idx+1}: {duration:.2f}s (静音补全)")
-                        except Exception as e:
-                             print(f"[WARN] Failed to create silence clip: {e}")
-                    else:
-                         print(f"[WARN] Cannot create silence clip (missing numpy/AudioClip), sync may break")
+                    segments.append(duration)
+                    print(f"[音频] 帧 {idx+1}: {duration:.2f}s (静音补全)")
 
-            # 合并所有音频（如果有多个）
-            combined_audio = None
-            if audio_clips and concatenate_audioclips:
-                try:
-                    import tempfile
-                    combined = concatenate_audioclips(audio_clips)
-                    # 保存到临时文件
-                    temp_audio = Path(tempfile.gettempdir()) / f"combined_audio_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp3"
-                    combined.write_audiofile(str(temp_audio), logger=None)
-                    combined_audio = temp_audio
-                    
-                    # 清理内存中的clips (保留 combined 用于后续引用? 不，combined_audio 是路径)
-                    for clip in audio_clips:
-                        clip.close()
-                    combined.close()
-                    
-                    print(f"[INFO] Combined {len(audio_clips)} audio clips into: {combined_audio}")
-                except Exception as e:
-                    print(f"[ERROR] Failed to combine audio clips: {e}")
-            
-            if audio_clips and not combined_audio:
+            # 合并所有音频
+            combined_audio = self._concat_audio_segments(segments) if segments else None
+            if segments and not combined_audio:
                 print("[WARNING] Failed to combine audio files. Will generate silent video.")
             
             # 渲染动画为视频
@@ -814,16 +1300,7 @@ class MediaComposer:
             duration = None
             if not combined_audio:
                 # 智能估算时长
-                total_est = 0
-                for frame in storyboard:
-                     text = frame.get("narration") or frame.get("body") or ""
-                     # 清除HTML标签
-                     if text:
-                         import re
-                         text = re.sub(r'<[^>]+>', '', text)
-                     est = max(3.0, len(text) * 0.3 + 1.0)
-                     total_est += est
-                duration = total_est
+                duration = sum(estimates)
                 print(f"[INFO] No audio available, using calculated duration: {duration}s")
             
             # 构建水印配置
@@ -836,19 +1313,25 @@ class MediaComposer:
                 "size": settings.watermark_size
             }
 
-            success = render_animation_to_video(
-                str(html_path),
-                str(combined_audio) if combined_audio else "",
-                str(output_path),
-                duration=duration,  # 自动从音频获取或使用计算时长
-                fps=settings.fps,
-                width=width,
-                height=height,
-                watermark_config=watermark_config,
-                progress_callback=progress_callback,
-                background_music=settings.background_music,
-                background_music_volume=settings.background_music_volume
-            )
+            try:
+                success = render_animation_to_video(
+                    str(html_path),
+                    str(combined_audio) if combined_audio else "",
+                    str(output_path),
+                    duration=duration,  # 自动从音频获取或使用计算时长
+                    fps=settings.fps,
+                    width=width,
+                    height=height,
+                    watermark_config=watermark_config,
+                    progress_callback=progress_callback,
+                    background_music=settings.background_music,
+                    background_music_volume=settings.background_music_volume,
+                    hw_encoder=settings.hw_encoder
+                )
+            finally:
+                # 拼接好的音频已混入视频，渲染结束立即删除，不留到实例回收
+                if combined_audio:
+                    combined_audio.unlink(missing_ok=True)
             
             if success and output_path.exists():
                 print(f"[SUCCESS] Animation video exported: {output_path}")
@@ -863,42 +1346,66 @@ class MediaComposer:
             traceback.print_exc()
             return None
     
-    def _combine_audio_files(self, audio_files: List[Path]) -> Optional[Path]:
-        """合并多个音频文件为一个"""
-        if not audio_files:
-            return None
-        
-        if len(audio_files) == 1:
-            return audio_files[0]
-        
-        try:
-            # Check global imports
-            if AudioFileClip is None or concatenate_audioclips is None:
-                raise ImportError("MoviePy not properly loaded")
+    def _concat_audio_segments(self, segments: Sequence[Union[Path, float]]) -> Optional[Path]:
+        """按顺序拼接音频文件与静音（float 表示静音秒数），返回临时 wav 文件，调用方用完后负责删除"""
+        # mkstemp 保证唯一文件名：并发导出不会按秒级时间戳撞名互相覆盖
+        fd, name = tempfile.mkstemp(suffix=".wav", prefix="combined_audio_")
+        os.close(fd)
+        temp_audio = Path(name)
+        if self._write_concat_audio(segments, temp_audio):
+            return temp_audio
+        temp_audio.unlink(missing_ok=True)
+        return None
 
-            import tempfile
-            
-            # 加载所有音频片段
-            clips = [AudioFileClip(str(f)) for f in audio_files]
-            
-            # 合并音频
-            combined = concatenate_audioclips(clips)
-            
-            # 保存到临时文件
-            temp_audio = Path(tempfile.gettempdir()) / f"combined_audio_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp3"
+    def _write_concat_audio(self, segments: Sequence[Union[Path, float]], temp_audio: Path) -> bool:
+        """把 segments 拼接写入 temp_audio，优先一次 FFmpeg 调用完成"""
+        ffmpeg = find_ffmpeg()
+        if ffmpeg:
+            # concat 滤镜（而非 concat demuxer）：mp3/wav 混合输入也能统一重采样后拼接
+            args = [ffmpeg, "-y", "-loglevel", "error"]
+            for segment in segments:
+                if isinstance(segment, Path):
+                    args += ["-i", str(segment)]
+                else:
+                    args += ["-f", "lavfi", "-t", f"{segment:.3f}", "-i", "anullsrc=r=44100:cl=stereo"]
+            labels = "".join(f"[a{i}]" for i in range(len(segments)))
+            filters = "".join(
+                f"[{i}:a]aformat=sample_fmts=s16:sample_rates=44100:channel_layouts=stereo[a{i}];"
+                for i in range(len(segments))
+            )
+            args += [
+                "-filter_complex", f"{filters}{labels}concat=n={len(segments)}:v=0:a=1[out]",
+                "-map", "[out]", "-c:a", "pcm_s16le", str(temp_audio),
+            ]
+            try:
+                subprocess.run(args, check=True, capture_output=True)
+                print(f"[INFO] Combined {len(segments)} audio segments via ffmpeg: {temp_audio}")
+                return True
+            except (OSError, subprocess.CalledProcessError) as e:
+                stderr = getattr(e, "stderr", b"") or b""
+                print(f"[WARN] ffmpeg audio concat failed, falling back to moviepy: {e} {stderr.decode(errors='ignore')[:300]}")
+
+        # 回退：moviepy 逐段加载后拼接
+        _load_moviepy()
+        if not AudioClip or not concatenate_audioclips:
+            print("[ERROR] moviepy not properly loaded, audio export may fail")
+            return False
+        # 每个 AudioFileClip 都要启动 ffmpeg 探测子进程，用线程池并行加载
+        with ThreadPoolExecutor(max_workers=_AUDIO_LOAD_WORKERS) as pool:
+            audio_clips = [clip for clip in pool.map(_load_audio_segment, segments) if clip is not None]
+        if not audio_clips:
+            return False
+        try:
+            combined = concatenate_audioclips(audio_clips)
             combined.write_audiofile(str(temp_audio), logger=None)
-            
-            # 清理
-            for clip in clips:
+            for clip in audio_clips:
                 clip.close()
             combined.close()
-            
-            print(f"[INFO] Combined {len(audio_files)} audio files into: {temp_audio}")
-            return temp_audio
-            
+            print(f"[INFO] Combined {len(audio_clips)} audio clips into: {temp_audio}")
+            return True
         except Exception as e:
-            print(f"[ERROR] Failed to combine audio files: {e}")
-            return None
+            print(f"[ERROR] Failed to combine audio clips: {e}")
+            return False
 
     def export_storyboard_video(
         self,
@@ -926,24 +1433,35 @@ class MediaComposer:
             if settings.include_audio and storyboard:
                 audio_paths = self._create_audio_segments(storyboard, tmp_path, settings)
 
+            filename = self._build_filename(topic)
+            output_path = destination.with_name(filename)
+            ffmpeg = find_ffmpeg()
+            if ffmpeg:
+                try:
+                    self._write_slideshow_ffmpeg(ffmpeg, storyboard, audio_paths, tmp_path, output_path, settings)
+                    return output_path
+                except (OSError, subprocess.CalledProcessError) as e:
+                    stderr = getattr(e, "stderr", b"") or b""
+                    print(f"[WARN] ffmpeg slideshow export failed, falling back to moviepy: {e} {stderr.decode(errors='ignore')[:300]}")
+
             clips: List[Any] = []
             try:
                 for idx, frame in enumerate(storyboard):
-                    image = self._build_slide_image(frame, width, height)
+                    # asarray 直接复用 PIL 的像素缓冲，不再像 np.array 那样整帧拷贝一份；随后释放 PIL 对象
+                    pixels = np.asarray(self._build_slide_image(frame, width, height))
                     # moviepy 2.x: duration is passed to constructor
                     duration = settings.slide_duration
                     if settings.include_audio and idx < len(audio_paths):
                         audio_clip = AudioFileClip(str(audio_paths[idx]))
                         duration = max(audio_clip.duration + 0.8, settings.slide_duration)
-                        clip = ImageClip(np.array(image), duration=duration)
+                        clip = ImageClip(pixels, duration=duration)
                         clip = clip.with_audio(audio_clip)
                     else:
-                        clip = ImageClip(np.array(image), duration=duration)
+                        clip = ImageClip(pixels, duration=duration)
                     clips.append(clip)
 
-                final_clip = concatenate_videoclips(clips, method="compose")
-                filename = self._build_filename(topic)
-                output_path = destination.with_name(filename)
+                # 所有幻灯片都按 (width, height) 生成，尺寸一致无需 compose 逐帧合成，直接首尾相接
+                final_clip = concatenate_videoclips(clips, method="chain")
                 final_clip.write_videofile(
                     str(output_path),
                     fps=settings.fps,
@@ -951,14 +1469,70 @@ class MediaComposer:
                     audio_codec="aac" if settings.include_audio and audio_paths else None,
                     temp_audiofile=str(tmp_path / "temp_audio.m4a"),
                     remove_temp=True,
-                    preset="medium",
-                    threads=2,
+                    preset="ultrafast",
+                    ffmpeg_params=_slideshow_x264_params(settings.fps),
+                    threads=settings.threads(),
                 )
                 return output_path
             finally:
                 for clip in clips:
                     clip.close()
 
+    def _write_slideshow_ffmpeg(
+        self,
+        ffmpeg: str,
+        storyboard: Sequence[Dict[str, str]],
+        audio_paths: List[Path],
+        workspace: Path,
+        output_path: Path,
+        settings: VideoSettings,
+    ) -> None:
+        """每页幻灯片存成 PNG，用 concat demuxer 的 duration 指定停留时长，由 ffmpeg 一次完成编码
+
+        静态画面无需经过 moviepy 逐帧合成（fps × 总时长 × 整帧拷贝），ffmpeg 只解码 N 张图片。
+        """
+        width, height = settings.size()
+        with_audio = settings.include_audio and bool(audio_paths)
+        entries: List[str] = []
+        segments: List[Union[Path, float]] = []
+        total = 0.0
+        slide = workspace
+        for idx, frame in enumerate(storyboard):
+            slide = workspace / f"slide_{idx:04d}.png"
+            self._build_slide_image(frame, width, height).save(slide, compress_level=1)
+            duration = settings.slide_duration
+            if with_audio and idx < len(audio_paths):
+                audio_duration = get_audio_duration(audio_paths[idx])
+                duration = max(audio_duration + 0.8, settings.slide_duration)
+                segments += [audio_paths[idx], duration - audio_duration]
+            else:
+                segments.append(duration)
+            entries.append(f"file '{_concat_escape(slide)}'\nduration {duration:.3f}\n")
+            total += duration
+        # concat demuxer 会忽略最后一条的 duration，需要再列一次最后一张图
+        entries.append(f"file '{_concat_escape(slide)}'\n")
+        list_file = workspace / "slides.txt"
+        list_file.write_text("".join(entries), encoding="utf-8")
+
+        combined_audio = self._concat_audio_segments(segments) if with_audio else None
+        args = [ffmpeg, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", str(list_file)]
+        if combined_audio:
+            args += ["-i", str(combined_audio)]
+        args += [
+            # 先转 yuv420p 再由 fps 滤镜复制帧：每页只做一次色彩转换，之后整段都是同一帧的引用
+            "-vf", f"format=yuv420p,fps={settings.fps}",
+            "-c:v", "libx264", "-preset", "ultrafast", *_slideshow_x264_params(settings.fps),
+            "-threads", str(settings.threads()),
+        ]
+        if combined_audio:
+            args += ["-c:a", "aac"]
+        args += ["-t", f"{total:.3f}", str(output_path)]
+        try:
+            subprocess.run(args, check=True, capture_output=True)
+        finally:
+            if combined_audio:
+                combined_audio.unlink(missing_ok=True)
+
     def _build_filename(self, topic: str) -> str:
         slug = slugify(topic or "知识可视化", "ksight")
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -972,47 +1546,61 @@ class MediaComposer:
     ) -> List[Path]:
         if settings.voice_provider and settings.voice_provider != "pyttsx3":
             return []
-        if pyttsx3 is None:
+        if _get_pyttsx3() is None:
             return []
-        engine = pyttsx3.init()
-        voice_id = settings.voice or self._pick_voice(engine)
-        if voice_id:
-            engine.setProperty("voice", voice_id)
-        engine.setProperty("rate", 180)
-        engine.setProperty("volume", 0.85)
 
+        texts: List[str] = []
         targets: List[Path] = []
         for idx, frame in enumerate(storyboard):
             heading = frame.get("heading") or "要点"
             body = frame.get("body") or ""
-            text = f"{heading}。{body}"
-            path = workspace / f"segment_{idx}.wav"
-            engine.save_to_file(text, str(path))
-            targets.append(path)
-        engine.runAndWait()
-        engine.stop()
+            texts.append(f"{heading}。{body}")
+            targets.append(workspace / f"segment_{idx}.wav")
+
+        # 冻结（PyInstaller）程序里 spawn 出的子进程会重新执行 GUI 入口，单帧也不值得开进程池：都走进程内共用引擎
+        if len(targets) > 1 and not getattr(sys, "frozen", False):
+            # pyttsx3 引擎持有全局驱动状态（SAPI/COM、espeak），不能跨线程共用，按帧分发到进程池并行合成；
+            # 未指定语音时由各子进程自己挑选，父进程不必为此再初始化一个引擎
+            workers = min(len(targets), os.cpu_count() or 1)
+            count = len(targets)
+            try:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    list(
+                        pool.map(
+                            _synth_one,
+                            texts,
+                            [settings.voice] * count,
+                            [_PYTTSX3_RATE] * count,
+                            [_PYTTSX3_VOLUME] * count,
+                            [str(path) for path in targets],
+                        )
+                    )
+                return [path for path in targets if path.exists()]
+            except Exception as exc:  # noqa: BLE001
+                log.warning("pyttsx3 process pool failed, synthesizing serially: %s", exc)
+
+        with self._tts_lock:
+            engine = self._engine()
+            if engine is None:
+                return []
+            # 共用引擎：每次调用都重新设置属性，避免沿用上一次的语音/语速
+            voice_id = settings.voice or _pick_pyttsx3_voice(engine)
+            _apply_pyttsx3_properties(engine, voice_id, _PYTTSX3_RATE, _PYTTSX3_VOLUME)
+            for text, path in zip(texts, targets):
+                if not path.exists():
+                    engine.save_to_file(text, str(path))
+            engine.runAndWait()
         return [path for path in targets if path.exists()]
 
     def _pick_voice(self, engine: Any) -> Optional[str]:
-        try:
-            voices = engine.getProperty("voices")
-        except Exception:  # noqa: BLE001
-            return None
-        preferred = ["zh", "cn", "chinese"]
-        for voice in voices:
-            voice_id = getattr(voice, "id", "") or ""
-            voice_name = getattr(voice, "name", "") or ""
-            label = f"{voice_id} {voice_name}".lower()
-            if any(token in label for token in preferred):
-                return voice_id
-        return voices[0].id if voices else None
+        return _pick_pyttsx3_voice(engine)
 
     def list_voices(self) -> List[Dict[str, str]]:
-        if pyttsx3 is None:
-            return []
-        engine = pyttsx3.init()
         voices: List[Dict[str, str]] = []
-        try:
+        with self._tts_lock:
+            engine = self._engine()
+            if engine is None:
+                return []
             for voice in engine.getProperty("voices"):
                 raw_languages = getattr(voice, "languages", []) or []
                 languages = []
@@ -1031,8 +1619,6 @@ class MediaComposer:
                         "languages": ", ".join(languages),
                     }
                 )
-        finally:
-            engine.stop()
         return voices
 
     def _build_slide_image(self, frame: Dict[str, str], width: int, height: int) -> Image.Image:
@@ -1064,25 +1650,26 @@ class MediaComposer:
         return background
 
     def _gradient_background(self, width: int, height: int) -> Image.Image:
-        base = Image.new("RGB", (width, height), "#EEF2FF")
-        overlay = Image.new("RGB", (width, height), "#C7D2FE")
-        mask = Image.linear_gradient("L").resize((width, height))
-        gradient = Image.composite(overlay, base, mask)
-        return gradient
+        key = (width, height)
+        template = self._bg_cache.get(key)
+        if template is None:
+            if np is not None:
+                # 纯竖向渐变：一列 alpha 广播到整幅画面，一次向量化计算代替 new/resize/composite 多次整帧分配
+                alpha = np.linspace(0.0, 1.0, height, dtype=np.float32)[:, None, None]
+                base = np.array([0xEE, 0xF2, 0xFF], dtype=np.float32)
+                overlay = np.array([0xC7, 0xD2, 0xFE], dtype=np.float32)
+                column = (base * (1.0 - alpha) + overlay * alpha).astype(np.uint8)
+                template = Image.fromarray(np.ascontiguousarray(np.broadcast_to(column, (height, width, 3))), "RGB")
+            else:
+                base = Image.new("RGB", (width, height), "#EEF2FF")
+                overlay = Image.new("RGB", (width, height), "#C7D2FE")
+                mask = Image.linear_gradient("L").resize((width, height))
+                template = Image.composite(overlay, base, mask)
+            self._bg_cache[key] = template
+        return template.copy()
 
     def _load_font(self, size: int, bold: bool = False) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
-        candidates = [
-            "msyhbd.ttc" if bold else "msyh.ttc",
-            "Microsoft YaHei UI Bold.ttf" if bold else "Microsoft YaHei UI.ttf",
-            "segoeuib.ttf" if bold else "segoeui.ttf",
-            "arialbd.ttf" if bold else "arial.ttf",
-        ]
-        for name in candidates:
-            try:
-                return ImageFont.truetype(name, size)
-            except OSError:
-                continue
-        return ImageFont.load_default()
+        return _load_slide_font(size, bold)
 
     def _wrap_text(
         self,
@@ -1093,21 +1680,27 @@ class MediaComposer:
     ) -> List[str]:
         if not text:
             return [""]
+        # 每个字符只测量一次宽度，再按累加宽度断行；逐字符调用 textlength(整行) 是 O(N²) 次 FreeType 排版
+        advances = {char: draw.textlength(char, font=font) for char in set(text) if char != "\n"}
         lines: List[str] = []
-        buffer = ""
+        buffer: List[str] = []
+        running = 0.0
         for char in text:
             if char == "\n":
-                lines.append(buffer)
-                buffer = ""
+                lines.append("".join(buffer))
+                buffer = []
+                running = 0.0
                 continue
-            proposal = buffer + char
-            if draw.textlength(proposal, font=font) <= max_width or not buffer:
-                buffer = proposal
+            width = advances[char]
+            if running + width <= max_width or not buffer:
+                buffer.append(char)
+                running += width
             else:
-                lines.append(buffer)
-                buffer = char
+                lines.append("".join(buffer))
+                buffer = [char]
+                running = width
         if buffer:
-            lines.append(buffer)
+            lines.append("".join(buffer))
         return lines
 
 
@@ -1120,29 +1713,53 @@ def get_audio_duration(audio_path: Path) -> float:
     Returns:
         音频时长（秒），如果失败返回6.0作为默认值
     """
-    if not audio_path.exists():
+    try:
+        stat = audio_path.stat()
+    except OSError:
         print(f"[警告] 音频文件不存在: {audio_path}")
         return 6.0
-    
-    if audio_path.stat().st_size == 0:
+
+    if stat.st_size == 0:
         print(f"[警告] 音频文件为空: {audio_path}")
         return 6.0
-    
-    try:
-        if AudioFileClip is None:
-            print("[警告] moviepy未安装，使用默认时长6秒")
+
+    # 以 (路径, mtime, 大小) 为键缓存：文件被重新生成后自动失效
+    duration = _probe_audio_duration(str(audio_path), stat.st_mtime_ns, stat.st_size)
+    if duration is None:
+        try:
+            _load_moviepy()
+            if AudioFileClip is None:
+                print("[警告] moviepy未安装，使用默认时长6秒")
+                return 6.0
+
+            clip = AudioFileClip(str(audio_path))
+            duration = clip.duration
+            clip.close()
+        except Exception as e:
+            print(f"[错误] 获取音频时长失败: {e}")
             return 6.0
-        
-        clip = AudioFileClip(str(audio_path))
-        duration = clip.duration
-        clip.close()
-        
-        # 确保时长合理（至少1秒）
-        if duration < 1.0:
-            print(f"[警告] 音频时长过短({duration:.2f}s)，使用1秒")
-            return 1.0
-        
-        return duration
-    except Exception as e:
-        print(f"[错误] 获取音频时长失败: {e}")
-        return 6.0
+
+    # 确保时长合理（至少1秒）
+    if duration < 1.0:
+        print(f"[警告] 音频时长过短({duration:.2f}s)，使用1秒")
+        return 1.0
+
+    return duration
+
+
+@lru_cache(maxsize=512)
+def _probe_audio_duration(path: str, mtime_ns: int, size: int) -> Optional[float]:
+    """用 ffprobe 只读容器头取时长，免去 moviepy/imageio 初始化和完整的 AudioFileClip；失败返回 None"""
+    ffprobe = find_ffprobe()
+    if ffprobe is None:
+        return None
+    try:
+        result = subprocess.run(
+            [ffprobe, "-v", "error", "-show_entries", "format=duration", "-of", "default=nw=1:nk=1", path],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return float(result.stdout.strip())
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return None
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import re
 from pathlib import Path
 from typing import Any, Dict, List, Sequence
 import sys
@@ -9,7 +10,7 @@ try:
     from .animation import default_storyboard, guard_animation_markup, storyboard_to_svg
     from .graph_builder import GraphBuilder
     from .local_generator import LocalGenerator
-    from .media import generate_tts_audio
+    from .media import generate_tts_batch_async, run_sync
     from .utils import ensure_dir
 except ImportError:
     PARENT_DIR = Path(__file__).resolve().parent
@@ -18,10 +19,13 @@ except ImportError:
     from animation import default_storyboard, guard_animation_markup, storyboard_to_svg
     from graph_builder import GraphBuilder
     from local_generator import LocalGenerator
-    from media import generate_tts_audio
+    from media import generate_tts_batch_async, run_sync
     from utils import ensure_dir
 
 
+_CODE_FENCE_RE = re.compile(r"```(?:markdown)?(.*?)```", re.DOTALL)
+
+
 def get_audio_duration(file_path: Path) -> float:
     try:
         from moviepy.editor import AudioFileClip
@@ -277,8 +281,7 @@ class VisualizationOrchestrator:
             
             # 简单清理
             if "```" in markdown_content:
-                import re
-                match = re.search(r'```(?:markdown)?(.*?)```', markdown_content, re.DOTALL)
+                match = _CODE_FENCE_RE.search(markdown_content)
                 if match:
                     markdown_content = match.group(1).strip()
             
@@ -701,36 +704,50 @@ class VisualizationOrchestrator:
             audio_dir = self.local_generator.offline_dir / "audio"
             ensure_dir(audio_dir)
             
-            # 同步生成音频文件，确保HTML生成时音频已存在
+            # 先收集需要生成的旁白，整批并发提交，确保HTML生成时音频已存在
+            pending = []
+            for idx, frame in enumerate(storyboard):
+                narration = frame.get("narration") or frame.get("body") or ""
+                if not narration:
+                    continue
+                # 尝试两种格式（gTTS/Edge TTS用mp3，pyttsx3用wav）
+                audio_path_mp3 = audio_dir / f"{topic}_{idx}.mp3"
+                audio_path_wav = audio_dir / f"{topic}_{idx}.wav"
+                
+                # 检查是否已存在有效的音频文件
+                has_valid_audio = (
+                    (audio_path_wav.exists() and audio_path_wav.stat().st_size > 0) or
+                    (audio_path_mp3.exists() and audio_path_mp3.stat().st_size > 0)
+                )
+                
+                if force_regenerate or not has_valid_audio:
+                    print(f"[生成] 音频文件: {audio_path_mp3.name}, 内容: {narration[:50]}...")
+                    pending.append((narration, audio_path_mp3))
+                else:
+                    print(f"[缓存] 使用已存在的音频: {audio_path_mp3.name if audio_path_mp3.exists() else audio_path_wav.name}")
+            
+            if pending:
+                try:
+                    # 生成音频（使用用户选择的TTS引擎和语音）
+                    results = run_sync(generate_tts_batch_async(pending, tts_engine, voice, tts_config, force=force_regenerate))
+                    for (_, audio_path_mp3), success in zip(pending, results):
+                        if not success:
+                            continue
+                        # 检查哪个文件真正生成了
+                        audio_path_wav = audio_path_mp3.with_suffix(".wav")
+                        if audio_path_mp3.exists() and audio_path_mp3.stat().st_size > 0:
+                            print(f"[OK] 音频已生成: {audio_path_mp3.name}")
+                        elif audio_path_wav.exists() and audio_path_wav.stat().st_size > 0:
+                            print(f"[OK] 音频已生成: {audio_path_wav.name}")
+                except Exception as e:
+                    print(f"生成音频失败: {e}")
+            
             for idx, frame in enumerate(storyboard):
                 narration = frame.get("narration") or frame.get("body") or ""
                 if narration:
-                    # 尝试两种格式（gTTS/Edge TTS用mp3，pyttsx3用wav）
                     audio_path_mp3 = audio_dir / f"{topic}_{idx}.mp3"
                     audio_path_wav = audio_dir / f"{topic}_{idx}.wav"
                     
-                    # 检查是否已存在有效的音频文件
-                    has_valid_audio = (
-                        (audio_path_wav.exists() and audio_path_wav.stat().st_size > 0) or
-                        (audio_path_mp3.exists() and audio_path_mp3.stat().st_size > 0)
-                    )
-                    
-                    if force_regenerate or not has_valid_audio:
-                        try:
-                            # 生成音频（使用用户选择的TTS引擎和语音）
-                            print(f"[生成] 音频文件: {audio_path_mp3.name}, 内容: {narration[:50]}...")
-                            success = generate_tts_audio(narration, audio_path_mp3, tts_engine, voice, tts_config)
-                            if success:
-                                # 检查哪个文件真正生成了
-                                if audio_path_mp3.exists() and audio_path_mp3.stat().st_size > 0:
-                                    print(f"[OK] 音频已生成: {audio_path_mp3.name}")
-                                elif audio_path_wav.exists() and audio_path_wav.stat().st_size > 0:
-                                    print(f"[OK] 音频已生成: {audio_path_wav.name}")
-                        except Exception as e:
-                            print(f"生成音频失败: {e}")
-                    else:
-                        print(f"[缓存] 使用已存在的音频: {audio_path_mp3.name if audio_path_mp3.exists() else audio_path_wav.name}")
-                    
                     # 添加音频文件路径（优先使用wav）
                     actual_audio_path = None
                     if audio_path_wav.exists() and audio_path_wav.stat().st_size > 0:
@@ -749,19 +766,14 @@ class VisualizationOrchestrator:
                         duration = get_audio_duration(actual_audio_path)
                         audio_durations.append(duration)
                         print(f"[时长] {actual_audio_path.name}: {duration:.2f}秒")
-                    else:
-                        # 无音频时，根据字数估算时长
-                        char_count = len(narration) if narration else 0
-                        estimated = max(3.0, char_count * 0.3 + 1.0)
-                        audio_durations.append(estimated)
-                        print(f"[时长] 无音频，估算时长: {estimated:.2f}秒 (字数: {char_count})")
+                        continue
                 else:
                     audio_files.append("")
-                    # 无音频时，根据字数估算时长
-                    char_count = len(narration) if narration else 0
-                    estimated = max(3.0, char_count * 0.3 + 1.0)
-                    audio_durations.append(estimated)
-                    print(f"[时长] 无音频，估算时长: {estimated:.2f}秒 (字数: {char_count})")
+                # 无音频时，根据字数估算时长
+                char_count = len(narration)
+                estimated = max(3.0, char_count * 0.3 + 1.0)
+                audio_durations.append(estimated)
+                print(f"[时长] 无音频，估算时长: {estimated:.2f}秒 (字数: {char_count})")
         
         # 检查markup是否包含AI生成的SVG内容
         has_svg_content = "<svg" in markup.lower() and len(markup) > 500
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
 import json
+import os
 import re
+import shutil
+import sys
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Union
+from typing import Any, Optional, Union
 
 _SAFE_NAME = re.compile(r"[^0-9A-Za-z\u4e00-\u9fa5\-_]+")
 
@@ -36,3 +40,43 @@ def write_json(destination: Union[str, Path], payload: Any) -> None:
 def read_json(source: Union[str, Path]) -> Any:
     path = Path(source)
     return json.loads(path.read_text(encoding="utf-8"))
+
+
+@lru_cache(maxsize=1)
+def find_ffmpeg() -> Optional[str]:
+    """定位 ffmpeg 可执行文件：优先 moviepy 依赖的 imageio-ffmpeg 自带版本，其次系统 PATH"""
+    try:
+        import imageio_ffmpeg
+
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:  # noqa: BLE001
+        return shutil.which("ffmpeg")
+
+
+@lru_cache(maxsize=1)
+def find_ffprobe() -> Optional[str]:
+    """定位 ffprobe：优先系统 PATH，其次与 ffmpeg 同目录（imageio-ffmpeg 不自带 ffprobe）"""
+    found = shutil.which("ffprobe")
+    if found:
+        return found
+    ffmpeg = find_ffmpeg()
+    if ffmpeg:
+        ffmpeg_path = Path(ffmpeg)
+        candidate = ffmpeg_path.with_name(ffmpeg_path.name.replace("ffmpeg", "ffprobe", 1))
+        if candidate != ffmpeg_path and candidate.is_file():
+            return str(candidate)
+    return None
+
+
+def user_cache_dir(*parts: str) -> Path:
+    """当前用户的缓存目录（Windows: %LOCALAPPDATA%，macOS: ~/Library/Caches，其他: $XDG_CACHE_HOME 或 ~/.cache）
+
+    打包后的程序目录可能只读，生成的缓存不放在安装目录/资源目录下。
+    """
+    if sys.platform == "win32":
+        base = Path(os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local")
+    elif sys.platform == "darwin":
+        base = Path.home() / "Library" / "Caches"
+    else:
+        base = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    return base.joinpath("phoenix", *parts)
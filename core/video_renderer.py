@@ -11,11 +11,22 @@
 from __future__ import annotations
 
 import os
+import subprocess
+import sys
 import time
 import tempfile
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Optional
 
+try:
+    from .utils import find_ffmpeg
+except ImportError:
+    PARENT_DIR = Path(__file__).resolve().parent
+    if str(PARENT_DIR) not in sys.path:
+        sys.path.append(str(PARENT_DIR))
+    from utils import find_ffmpeg
+
 try:
     from PIL import Image, ImageDraw, ImageFont
     PIL_AVAILABLE = True
@@ -49,6 +60,58 @@ except ImportError:
     print("[WARNING] Playwright not available. Video export will use fallback method.")
 
 
+# 硬件编码器探测顺序：NVIDIA NVENC、Apple VideoToolbox、Intel Quick Sync
+_HW_ENCODER_PRIORITY = ("h264_nvenc", "h264_videotoolbox", "h264_qsv")
+
+# 各编码器的质量参数（libx264 为默认的 CPU 编码），只放该编码器自身支持的选项
+_ENCODER_OPTIONS = {
+    "libx264": {"preset": "slow", "ffmpeg_params": ["-crf", "18"]},  # 慢速预设 + CRF 18 (视觉无损)
+    "h264_nvenc": {"preset": "p4", "ffmpeg_params": ["-tune", "hq", "-rc", "vbr", "-cq", "19", "-b:v", "0"]},
+    # VideoToolbox 没有 -preset，也没有跨平台可用的恒定质量模式，只能指定码率
+    "h264_videotoolbox": {"ffmpeg_params": ["-b:v", "12M"]},
+    "h264_qsv": {"preset": "medium", "ffmpeg_params": ["-global_quality", "20"]},
+}
+
+
+@lru_cache(maxsize=1)
+def _ffmpeg_video_encoders() -> frozenset:
+    """列出 ffmpeg 支持的视频编码器（进程内只探测一次）"""
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        return frozenset()
+    try:
+        output = subprocess.run(
+            [ffmpeg, "-hide_banner", "-encoders"], capture_output=True, text=True, timeout=10
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return frozenset()
+    rows = (line.split() for line in output.splitlines())
+    return frozenset(row[1] for row in rows if len(row) > 1 and row[0].startswith("V"))
+
+
+def _resolve_video_encoder(hw_encoder: Optional[str]) -> str:
+    """把设置中的编码器选项解析为 ffmpeg 编码器名，不可用时回退 libx264"""
+    if not hw_encoder or hw_encoder == "libx264":
+        return "libx264"
+    encoders = _ffmpeg_video_encoders()
+    if hw_encoder == "auto":
+        return next((name for name in _HW_ENCODER_PRIORITY if name in encoders), "libx264")
+    return hw_encoder if hw_encoder in encoders else "libx264"
+
+
+def _write_video(final_clip, output_path: str, hw_encoder: Optional[str] = None, **kwargs) -> None:
+    """写出视频文件；硬件编码器运行失败（如编译了 NVENC 但没有可用 GPU）时用 libx264 重试"""
+    codec = _resolve_video_encoder(hw_encoder)
+    if codec != "libx264":
+        print(f"[INFO] 使用硬件编码器: {codec}")
+        try:
+            final_clip.write_videofile(output_path, codec=codec, **_ENCODER_OPTIONS[codec], **kwargs)
+            return
+        except Exception as e:
+            print(f"[WARNING] 硬件编码器 {codec} 失败，回退到 libx264: {e}")
+    final_clip.write_videofile(output_path, codec="libx264", **_ENCODER_OPTIONS["libx264"], **kwargs)
+
+
 def _text_to_image_watermark(config: dict) -> dict:
     """
     将文字水印转换为图片水印，以解决浏览器字体渲染问题 (Mojibake)
@@ -143,7 +206,8 @@ def render_animation_to_video(
     watermark_config: dict = None,
     background_music: str = None,
     background_music_volume: float = 0.5,
-    progress_callback = None
+    progress_callback = None,
+    hw_encoder: Optional[str] = None
 ) -> bool:
     """
     渲染 HTML 动画为视频文件（精确同步版）
@@ -160,6 +224,7 @@ def render_animation_to_video(
         background_music: 背景音乐路径
         background_music_volume: 背景音乐音量 (0.0-1.0)
         progress_callback: 进度回调函数 function(percentage: float, message: str)
+        hw_encoder: 视频编码器，None 为 libx264，"auto" 自动选择可用的硬件编码器
     
     Returns:
         bool: 是否成功
@@ -219,7 +284,8 @@ def render_animation_to_video(
             background_music,
             background_music_volume,
             progress_callback,
-            fps=fps
+            fps=fps,
+            hw_encoder=hw_encoder
         )
         
         # 清理临时文件
@@ -982,7 +1048,8 @@ def _compose_video_optimized(
     background_music: str = None,
     background_music_volume: float = 0.3,
     progress_callback = None,
-    fps: int = 30
+    fps: int = 30,
+    hw_encoder: Optional[str] = None
 ) -> bool:
     """
     优化的视频合成（精确同步模式）
@@ -1107,14 +1174,13 @@ def _compose_video_optimized(
         if progress_callback:
             progress_callback(92, "正在合成视频 (这可能需要几分钟)...")
             
-        final_clip.write_videofile(
+        _write_video(
+            final_clip,
             output_path,
+            hw_encoder,
             fps=target_fps,  # 输出也使用30fps
-            codec='libx264',
             audio_codec='aac',
-            preset='slow',  # 使用慢速预设以获得更好压缩率
             threads=4,
-            ffmpeg_params=['-crf', '18'],  # 使用 CRF 18 (视觉无损) 代替固定码率
             logger=None
         )
         
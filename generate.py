@@ -7,6 +7,8 @@ with options for both online (AI-powered) and offline (Template-based) modes.
 import argparse
 import asyncio
 import json
+import logging
+import multiprocessing
 import sys
 from pathlib import Path
 
@@ -30,8 +32,11 @@ async def main():
                         default="animation", help="Type of content to generate")
     parser.add_argument("--output", default="output", help="Directory to save output files")
     parser.add_argument("--language", default="zh", choices=["zh", "en"], help="Language (zh/en)")
+    parser.add_argument("--quiet", action="store_true", help="Only show TTS warnings and errors")
     
     args = parser.parse_args()
+    if args.quiet:
+        logging.getLogger("phoenix.media").setLevel(logging.WARNING)
     
     # Setup directories
     base_dir = Path(__file__).parent
@@ -186,4 +191,5 @@ async def main():
         traceback.print_exc()
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     asyncio.run(main())
@@ -12,6 +12,7 @@ import tempfile
 import json
 import re
 import math
+import multiprocessing
 import asyncio
 import threading
 from pathlib import Path
@@ -139,6 +140,10 @@ class AppSettings:
     watermark_opacity: float = 0.8
     watermark_size: float = 0.15  # 相对高度(图片)或字体大小因子(文字)
 
+    # 视频编码器: 默认 None 使用 libx264 (CRF 18)；可选 "auto" 自动使用可用的硬件编码器 (NVENC/VideoToolbox/QSV)，
+    # 或直接指定如 "h264_nvenc"。硬件编码的画质/码率控制与 libx264 不同，需用户主动开启
+    hw_encoder: Optional[str] = None
+
     @classmethod
     def load(cls):
         if SETTINGS_FILE.exists():
@@ -174,7 +179,8 @@ class AppSettings:
             watermark_content=self.watermark_content,
             watermark_position=self.watermark_position,
             watermark_opacity=self.watermark_opacity,
-            watermark_size=self.watermark_size
+            watermark_size=self.watermark_size,
+            hw_encoder=self.hw_encoder
         )
 
     def save(self):
@@ -6569,4 +6575,5 @@ def main():
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # 冻结程序中进程池的子进程不会重新执行 GUI 入口
     main()